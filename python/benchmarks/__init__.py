@@ -0,0 +1 @@
+"""Benchmarks for the youtube simulator, run against synthetic catalogs."""
@@ -0,0 +1,135 @@
+"""A generator of synthetic video catalogs for benchmarking.
+
+Catalogs are written in the same pipe-delimited format as src/videos.txt.
+Title words and tags are drawn from Zipf-like distributions, so a few are
+common and most are rare, as in a real catalog. The same spec always
+produces the same catalog.
+
+To write a catalog by hand:
+    python3 -m benchmarks.catalog_generator videos_1e5.txt --size 100000
+"""
+import argparse
+from collections import namedtuple
+from itertools import accumulate
+import random
+
+# The shape of a synthetic catalog.
+#   size: the number of videos.
+#   tag_count: the number of distinct tags.
+#   max_tags: the most tags a single video has.
+#   title_words: the (low, mode, high) number of words in a title, drawn
+#       from a triangular distribution.
+#   vocabulary: the number of distinct title words.
+#   flagged_fraction: the fraction of videos a benchmark flags after
+#       loading the catalog. Catalog files carry no flags themselves.
+#   seed: the seed every random choice is derived from.
+CatalogSpec = namedtuple(
+    "CatalogSpec",
+    ["size", "tag_count", "max_tags", "title_words", "vocabulary",
+     "flagged_fraction", "seed"],
+    defaults=[1000, 200, 3, (1, 3, 12), 5000, 0.01, 0])
+
+_SYLLABLES = ("ka", "lo", "mi", "ra", "to", "ne", "su", "vi", "da", "pe",
+              "zo", "fu", "gi", "ha", "ju", "be")
+
+
+def _words(count, rng):
+    """Returns count distinct made-up words."""
+    words = set()
+    while len(words) < count:
+        words.add("".join(rng.choice(_SYLLABLES)
+                          for _ in range(rng.randint(2, 4))))
+    return sorted(words)
+
+
+def _zipf_weights(count):
+    """Returns cumulative Zipf weights for ranks 1 to count."""
+    return list(accumulate(1 / rank for rank in range(1, count + 1)))
+
+
+def video_id(index):
+    """Returns the id of the video at index in a generated catalog."""
+    return f"video_{index:08d}_id"
+
+
+def catalog_entries(spec):
+    """Yields the (title, video_id, tags) entries of a synthetic catalog.
+
+    Args:
+        spec: The CatalogSpec of the catalog.
+    """
+    rng = random.Random(spec.seed)
+    vocabulary = _words(spec.vocabulary, rng)
+    word_weights = _zipf_weights(len(vocabulary))
+    tags = [f"#{word}" for word in _words(spec.tag_count, rng)]
+    tag_weights = _zipf_weights(len(tags))
+    low, mode, high = spec.title_words
+    for index in range(spec.size):
+        word_count = round(rng.triangular(low, high, mode))
+        title = " ".join(
+            rng.choices(vocabulary, cum_weights=word_weights, k=word_count))
+        video_tags = set(rng.choices(tags, cum_weights=tag_weights,
+                                     k=rng.randint(0, spec.max_tags)))
+        yield title.capitalize(), video_id(index), sorted(video_tags)
+
+
+def write_catalog(path, spec):
+    """Writes a synthetic catalog file.
+
+    Args:
+        path: The catalog file to write.
+        spec: The CatalogSpec of the catalog.
+    """
+    with open(path, "w", encoding="utf-8") as catalog_file:
+        for title, vid, tags in catalog_entries(spec):
+            catalog_file.write(f"{title} | {vid} | {' , '.join(tags)}\n")
+
+
+def flagged_ids(spec):
+    """Returns the ids of the videos a benchmark flags for a spec."""
+    rng = random.Random(spec.seed + 1)
+    count = round(spec.size * spec.flagged_fraction)
+    return [video_id(index) for index in rng.sample(range(spec.size), count)]
+
+
+def add_spec_arguments(arg_parser):
+    """Adds the options describing a CatalogSpec, other than its size."""
+    defaults = CatalogSpec()
+    arg_parser.add_argument("--tags", type=int, default=defaults.tag_count,
+                            help="number of distinct tags")
+    arg_parser.add_argument("--max-tags", type=int, default=defaults.max_tags,
+                            help="most tags on a single video")
+    arg_parser.add_argument(
+        "--title-words", type=int, nargs=3, default=defaults.title_words,
+        metavar=("LOW", "MODE", "HIGH"),
+        help="triangular distribution of the number of words in a title")
+    arg_parser.add_argument("--vocabulary", type=int,
+                            default=defaults.vocabulary,
+                            help="number of distinct title words")
+    arg_parser.add_argument("--flagged", type=float,
+                            default=defaults.flagged_fraction,
+                            help="fraction of videos to flag")
+    arg_parser.add_argument("--seed", type=int, default=defaults.seed)
+
+
+def spec_from_arguments(args, size):
+    """Returns the CatalogSpec given by parsed add_spec_arguments options."""
+    return CatalogSpec(size, args.tags, args.max_tags,
+                       tuple(args.title_words), args.vocabulary, args.flagged,
+                       args.seed)
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(
+        description="Writes a synthetic video catalog.")
+    arg_parser.add_argument("path", help="catalog file to write")
+    arg_parser.add_argument("--size", type=lambda s: int(float(s)),
+                            default=CatalogSpec().size,
+                            help="number of videos, such as 1e5")
+    add_spec_arguments(arg_parser)
+    args = arg_parser.parse_args(argv)
+    write_catalog(args.path, spec_from_arguments(args, args.size))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,329 @@
+"""Times library loading and every command against synthetic catalogs.
+
+For each catalog size, the suite times:
+
+    load      building a VideoLibrary from the catalog text, in parallel,
+              lazily, and from a binary snapshot
+    command   every command run through a CommandParser
+    dispatch  the CommandParser overhead over calling the player directly
+
+Output goes to a NullSink, so the times are of the work and not the
+terminal. The results are written as JSON, and can be checked against an
+earlier run to catch regressions:
+
+    python3 -m benchmarks.run --sizes 1e3 1e4 1e5 --output baseline.json
+    python3 -m benchmarks.run --sizes 1e3 1e4 1e5 --compare baseline.json
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import zlib
+
+from src.command_parser import CommandException
+from src.command_parser import CommandParser
+from src.output import NullSink
+from src.video_library import VideoLibrary
+from src.video_player import VideoPlayer
+
+from .catalog_generator import add_spec_arguments
+from .catalog_generator import flagged_ids
+from .catalog_generator import spec_from_arguments
+from .catalog_generator import video_id
+from .catalog_generator import write_catalog
+
+DEFAULT_SIZES = (1000, 10000, 100000)
+# The calls timed together in one dispatch sample, which are too quick to
+# time one by one.
+DISPATCH_BATCH = 1000
+# The video ids given to each bulk command.
+BULK_SIZE = 20
+
+
+def _time(function, repeat, budget, batch=1):
+    """Returns the time in nanoseconds of each call to function.
+
+    function is called with the run number, from 0. It runs repeat times,
+    or fewer once budget seconds have been spent, but at least once. With
+    a batch, each run calls function batch times and counts their mean.
+    """
+    times = []
+    deadline = time.perf_counter() + budget
+    for run in range(repeat):
+        start = time.perf_counter_ns()
+        for _ in range(batch):
+            function(run)
+        times.append((time.perf_counter_ns() - start) / batch)
+        if time.perf_counter() > deadline:
+            break
+    return times
+
+
+def _result(size, group, name, times):
+    return {
+        "size": size,
+        "group": group,
+        "name": name,
+        "runs": len(times),
+        "min_ns": round(min(times)),
+        "median_ns": round(statistics.median(times)),
+        "mean_ns": round(statistics.mean(times)),
+        "max_ns": round(max(times)),
+    }
+
+
+def _catalog_path(catalog_dir, spec):
+    """Returns a generated catalog for spec, reusing one already written."""
+    name = f"catalog_{spec.size}_{zlib.crc32(repr(spec).encode()):08x}.txt"
+    path = os.path.join(catalog_dir, name)
+    if not os.path.exists(path):
+        write_catalog(f"{path}.tmp", spec)
+        os.replace(f"{path}.tmp", path)
+    return path
+
+
+def _load_benchmarks(path, repeat, budget):
+    """Yields the (name, times) of each way of loading a library."""
+    snapshot_path = f"{path}.snapshot"
+
+    def compile_snapshot(run):
+        if os.path.exists(snapshot_path):
+            os.remove(snapshot_path)
+        VideoLibrary(path, snapshot_path=snapshot_path)
+
+    loaders = [
+        ("parse", lambda run: VideoLibrary(path)),
+        ("parse_parallel", lambda run: VideoLibrary(path, workers=None)),
+        ("lazy", lambda run: VideoLibrary(path, lazy=True)),
+        ("lazy_then_index",
+         lambda run: VideoLibrary(path, lazy=True).get_all_videos()),
+        ("snapshot_compile", compile_snapshot),
+        ("snapshot", lambda run: VideoLibrary(path, snapshot_path=snapshot_path)),
+    ]
+    for name, loader in loaders:
+        yield name, _time(loader, repeat, budget)
+
+
+def _command_cases(library, ids):
+    """Returns the (name, command) cases timed against a library.
+
+    command is called with the run number and returns the command to run.
+    Cases run in order, each one run after another, so playlist cases
+    find the playlists and videos the earlier cases left.
+    """
+    videos = [library.get_video(vid) for vid in ids]
+    words = [vid.title.split()[0] for vid in videos]
+    # The same words with their second letter dropped, as a typo.
+    typos = [word[:1] + word[2:] for word in words]
+    tags = [vid.tags[0] if vid.tags else "#none" for vid in videos]
+
+    def pick(items):
+        return lambda run: items[run % len(items)]
+
+    def batch(run):
+        return [ids[(run + i) % len(ids)] for i in range(BULK_SIZE)]
+
+    video, word, typo, tag = pick(ids), pick(words), pick(typos), pick(tags)
+    return [
+        ("NUMBER_OF_VIDEOS", lambda run: ["NUMBER_OF_VIDEOS"]),
+        ("SHOW_ALL_VIDEOS", lambda run: ["SHOW_ALL_VIDEOS"]),
+        ("SHOW_ALL_VIDEOS limit=20",
+         lambda run: ["SHOW_ALL_VIDEOS", "limit=20"]),
+        ("PLAY", lambda run: ["PLAY", video(run)]),
+        ("PAUSE", lambda run: ["PAUSE"]),
+        ("CONTINUE", lambda run: ["CONTINUE"]),
+        ("SHOW_PLAYING", lambda run: ["SHOW_PLAYING"]),
+        ("STOP", lambda run: ["STOP"]),
+        ("PLAY_RANDOM", lambda run: ["PLAY_RANDOM"]),
+        ("CREATE_PLAYLIST", lambda run: ["CREATE_PLAYLIST", f"bench_{run}"]),
+        ("CREATE_PLAYLIST bench_bulk",
+         lambda run: ["CREATE_PLAYLIST", "bench_bulk"]),
+        ("ADD_TO_PLAYLIST",
+         lambda run: ["ADD_TO_PLAYLIST", "bench_0", video(run)]),
+        ("SHOW_PLAYLIST", lambda run: ["SHOW_PLAYLIST", "bench_0"]),
+        ("SHOW_ALL_PLAYLISTS", lambda run: ["SHOW_ALL_PLAYLISTS"]),
+        ("REMOVE_FROM_PLAYLIST",
+         lambda run: ["REMOVE_FROM_PLAYLIST", "bench_0", video(run)]),
+        ("CLEAR_PLAYLIST", lambda run: ["CLEAR_PLAYLIST", "bench_0"]),
+        ("DELETE_PLAYLIST", lambda run: ["DELETE_PLAYLIST", f"bench_{run}"]),
+        ("SEARCH_VIDEOS", lambda run: ["SEARCH_VIDEOS", word(run)]),
+        ("SEARCH_VIDEOS limit=20",
+         lambda run: ["SEARCH_VIDEOS", word(run), "limit=20"]),
+        ("SEARCH_VIDEOS_WITH_TAG",
+         lambda run: ["SEARCH_VIDEOS_WITH_TAG", tag(run)]),
+        ("SEARCH_RANKED",
+         lambda run: ["SEARCH_RANKED", word(run), word(run + 1)]),
+        ("SEARCH_FUZZY", lambda run: ["SEARCH_FUZZY", typo(run)]),
+        ("COMPLETE", lambda run: ["COMPLETE", word(run)[:2]]),
+        ("FLAG_VIDEO", lambda run: ["FLAG_VIDEO", video(run), "benchmark"]),
+        ("ALLOW_VIDEO", lambda run: ["ALLOW_VIDEO", video(run)]),
+        ("BULK_FLAG_VIDEO",
+         lambda run: ["BULK_FLAG_VIDEO"] + batch(run) + ["reason=benchmark"]),
+        ("BULK_ALLOW_VIDEO", lambda run: ["BULK_ALLOW_VIDEO"] + batch(run)),
+        ("BULK_ADD_TO_PLAYLIST",
+         lambda run: ["BULK_ADD_TO_PLAYLIST", "bench_bulk"] + batch(run)),
+        ("HELP", lambda run: ["HELP"]),
+    ]
+
+
+def _command_benchmarks(path, spec, repeat, budget):
+    """Yields the (group, name, times) of every command and of dispatch."""
+    library = VideoLibrary(path)
+    for vid in flagged_ids(spec):
+        library.flag_video(vid, "benchmark")
+    player = VideoPlayer(input_reader=lambda: "no", output=NullSink(),
+                         library=library)
+    parser = CommandParser(player)
+    rng = random.Random(spec.seed + 2)
+    ids = [video_id(rng.randrange(spec.size)) for _ in range(repeat)]
+
+    for name, command in _command_cases(library, ids):
+        yield "command", name, _time(
+            lambda run: parser.execute_command(command(run)), repeat, budget)
+
+    def usage_error(run):
+        try:
+            parser.execute_command(["PLAY"])
+        except CommandException:
+            pass
+
+    dispatchers = [
+        ("direct", lambda run: player.number_of_videos()),
+        ("parser", lambda run: parser.execute_command(["NUMBER_OF_VIDEOS"])),
+        ("parser_unknown",
+         lambda run: parser.execute_command(["NOT_A_COMMAND"])),
+        ("parser_usage_error", usage_error),
+    ]
+    for name, dispatch in dispatchers:
+        yield "dispatch", name, _time(dispatch, repeat, budget,
+                                      DISPATCH_BATCH)
+
+
+def run_benchmarks(sizes, spec, catalog_dir, repeat=20, budget=2.0,
+                   log=None):
+    """Runs the suite at every catalog size.
+
+    Args:
+        sizes: The numbers of videos to benchmark.
+        spec: The CatalogSpec of the catalogs. Its size is replaced by
+            each of sizes in turn.
+        catalog_dir: Where generated catalogs are kept. A catalog already
+            there for the same spec is reused.
+        repeat: The most times each benchmark runs.
+        budget: The seconds after which a benchmark stops repeating.
+        log: An optional file each result is described on as it comes in.
+
+    Returns:
+        A list of result dicts, one per benchmark and size.
+    """
+    results = []
+
+    def record(size, group, name, times):
+        result = _result(size, group, name, times)
+        results.append(result)
+        if log is not None:
+            print(f"{size:>10} {group:<9} {name:<26} "
+                  f"{result['median_ns'] / 1e6:12.3f} ms", file=log)
+
+    for size in sizes:
+        size_spec = spec._replace(size=size)
+        path = _catalog_path(catalog_dir, size_spec)
+        for name, times in _load_benchmarks(path, min(repeat, 5), budget):
+            record(size, "load", name, times)
+        for group, name, times in _command_benchmarks(path, size_spec, repeat,
+                                                      budget):
+            record(size, group, name, times)
+    return results
+
+
+def compare(results, baseline, tolerance):
+    """Returns the results that got slower than in a baseline.
+
+    Benchmarks are compared on their fastest run, which is the least noisy.
+
+    Args:
+        results: The result dicts of this run.
+        baseline: The result dicts of an earlier run.
+        tolerance: How many times slower than the baseline a result may be.
+
+    Returns:
+        A list of (result, baseline result) pairs.
+    """
+    def key(result):
+        return result["size"], result["group"], result["name"]
+
+    earlier = {key(result): result for result in baseline}
+    return [(result, earlier[key(result)]) for result in results
+            if key(result) in earlier
+            and result["min_ns"] > tolerance * earlier[key(result)]["min_ns"]]
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(
+        description="Benchmarks the youtube simulator.")
+    arg_parser.add_argument(
+        "--sizes", type=lambda s: int(float(s)), nargs="+",
+        default=DEFAULT_SIZES, metavar="N",
+        help="catalog sizes to benchmark, such as 1e3 1e5 1e7")
+    add_spec_arguments(arg_parser)
+    arg_parser.add_argument("--repeat", type=int, default=20,
+                            help="most runs of each benchmark")
+    arg_parser.add_argument("--budget", type=float, default=2.0,
+                            help="seconds after which a benchmark stops "
+                                 "repeating")
+    arg_parser.add_argument("--catalog-dir", metavar="DIR",
+                            help="keep generated catalogs in DIR for reuse")
+    arg_parser.add_argument("--output", metavar="FILE",
+                            help="write the JSON results to FILE rather "
+                                 "than stdout")
+    arg_parser.add_argument("--compare", metavar="FILE",
+                            help="fail if slower than the results in FILE")
+    arg_parser.add_argument("--tolerance", type=float, default=1.5,
+                            help="how many times slower than --compare "
+                                 "results may be")
+    args = arg_parser.parse_args(argv)
+
+    spec = spec_from_arguments(args, 0)
+    catalog_dir = args.catalog_dir or tempfile.mkdtemp(prefix="yt_bench_")
+    os.makedirs(catalog_dir, exist_ok=True)
+    try:
+        results = run_benchmarks(args.sizes, spec, catalog_dir, args.repeat,
+                                 args.budget, log=sys.stderr)
+    finally:
+        if args.catalog_dir is None:
+            shutil.rmtree(catalog_dir)
+
+    report = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "spec": spec._asdict(),
+        "results": results,
+    }
+    if args.output is None:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    else:
+        with open(args.output, "w", encoding="utf-8") as output_file:
+            json.dump(report, output_file, indent=2)
+
+    if args.compare is not None:
+        with open(args.compare, encoding="utf-8") as baseline_file:
+            baseline = json.load(baseline_file)["results"]
+        regressions = compare(results, baseline, args.tolerance)
+        for result, earlier in regressions:
+            print(f"Slower: {result['name']} ({result['group']}) at "
+                  f"{result['size']} videos took {result['min_ns']} ns, "
+                  f"was {earlier['min_ns']} ns", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""Options and setup shared by the src.run and src.server entry points."""
+import os
+
+from .moderation_journal import ModerationJournal
+from .playlist_store import PlaylistStore
+from .stats import CommandStats
+from .video_library import VideoLibrary
+
+
+def add_state_arguments(arg_parser, kept):
+    """Adds the --state-dir, --stats and --stats-file options.
+
+    Args:
+        arg_parser: The argparse.ArgumentParser of the entry point.
+        kept: What --state-dir keeps, such as "video flags".
+    """
+    arg_parser.add_argument(
+        "--state-dir", metavar="DIR",
+        help=f"keep {kept} in DIR, so they survive a restart, and a "
+             f"snapshot of the catalog that loads faster than the text")
+    arg_parser.add_argument(
+        "--stats", action="store_true",
+        help="time every command, for the STATS command to show")
+    arg_parser.add_argument(
+        "--stats-file", metavar="FILE",
+        help="time every command and write the statistics to FILE as JSON "
+             "on exit")
+
+
+class AppState:
+    """A class used to represent what an entry point runs with.
+
+    That is the statistics, the stores kept in --state-dir and the shared
+    VideoLibrary, as set up from the options of add_state_arguments.
+    """
+
+    def __init__(self, args, keep_playlists=False):
+        """Sets up the state the parsed options ask for.
+
+        Args:
+            args: The parsed options, including those of
+                add_state_arguments.
+            keep_playlists: Whether to open a PlaylistStore in the state
+                directory, as well as the flag journal.
+        """
+        self._stats_file = args.stats_file
+        self.stats = None
+        if args.stats or args.stats_file is not None:
+            self.stats = CommandStats()
+        self.playlist_store = None
+        self.flag_journal = None
+        snapshot_path = None
+        if args.state_dir is not None:
+            os.makedirs(args.state_dir, exist_ok=True)
+            if keep_playlists:
+                self.playlist_store = PlaylistStore(
+                    os.path.join(args.state_dir, "playlists"))
+            self.flag_journal = ModerationJournal(
+                os.path.join(args.state_dir, "flags"))
+            snapshot_path = os.path.join(args.state_dir, "catalog.snapshot")
+        # Only the videos the first commands touch are built at startup. The
+        # rest of the catalog, and each search index, is loaded when needed.
+        self.library = VideoLibrary(
+            lazy=True, snapshot_path=snapshot_path,
+            flag_journal=self.flag_journal, stats=self.stats)
+
+    def close(self):
+        """Closes the stores and writes the statistics to --stats-file."""
+        if self.playlist_store is not None:
+            self.playlist_store.close()
+        if self.flag_journal is not None:
+            self.flag_journal.close()
+        if self._stats_file is not None:
+            self.stats.export(self._stats_file)
@@ -0,0 +1,229 @@
+"""Readers for the pipe-delimited video catalog file."""
+
+from concurrent.futures import ProcessPoolExecutor
+import csv
+import io
+import mmap
+import os
+import warnings
+
+# Files smaller than this are not worth splitting across processes.
+_MIN_CHUNK_SIZE = 1 << 20
+
+
+class CatalogWarning(UserWarning):
+    """Warning issued for catalog lines that cannot be parsed."""
+    pass
+
+
+def _entry_from_fields(video_info):
+    """Returns the (title, video_id, tags) entry for one catalog line."""
+    title, url, tags = video_info
+    return (
+        title,
+        url,
+        [tag.strip() for tag in tags.split(",")] if tags else [],
+    )
+
+
+def _parse_lines(lines, first_line_number, malformed):
+    """Yields a (title, video_id, tags) entry for each well-formed line.
+
+    Args:
+        lines: The catalog lines to parse.
+        first_line_number: The 1-based line number of the first line.
+        malformed: A list that gets a (line_number, line) pair for every
+            line that is not made of three fields. Blank lines are skipped
+            silently.
+    """
+    reader = csv.reader(lines, delimiter="|")
+    for video_info in reader:
+        video_info = [item.strip() for item in video_info]
+        if len(video_info) == 3:
+            yield _entry_from_fields(video_info)
+        elif any(video_info):
+            malformed.append((first_line_number - 1 + reader.line_num,
+                              "|".join(video_info)))
+
+
+def _warn_malformed(path, malformed):
+    for line_number, line in malformed:
+        warnings.warn(
+            f"Skipping malformed line {line_number} of {path}: {line!r}",
+            CatalogWarning, stacklevel=3)
+
+
+def read_catalog(path):
+    """Yields a (title, video_id, tags) entry for each line of a catalog.
+
+    Malformed lines are skipped with a CatalogWarning naming the line.
+
+    Args:
+        path: The catalog file to read.
+    """
+    malformed = []
+    with open(path, encoding="utf-8") as video_file:
+        for entry in _parse_lines(video_file, 1, malformed):
+            yield entry
+            if malformed:
+                _warn_malformed(path, malformed)
+                malformed.clear()
+    _warn_malformed(path, malformed)
+
+
+def _chunk_bounds(path, chunk_count):
+    """Splits a file into about chunk_count byte ranges on line boundaries."""
+    size = os.path.getsize(path)
+    chunk_size = max(size // chunk_count, 1)
+    bounds = []
+    with open(path, "rb") as video_file:
+        start = 0
+        while start < size:
+            video_file.seek(min(start + chunk_size, size))
+            # Finish the line the seek landed in.
+            video_file.readline()
+            end = min(video_file.tell(), size)
+            bounds.append((start, end))
+            start = end
+    return bounds
+
+
+def _parse_chunk(path, start, end):
+    """Parses the lines in a byte range of a catalog, in a worker process.
+
+    Returns:
+        The entries, the malformed lines as for _parse_lines with line
+        numbers counted from the start of the chunk, and the number of
+        lines in the chunk.
+    """
+    with open(path, "rb") as video_file:
+        video_file.seek(start)
+        text = video_file.read(end - start).decode("utf-8")
+    # Split exactly as read_catalog's text file does. str.splitlines would
+    # also break on characters such as form feeds or U+2028 in a title.
+    lines = list(io.StringIO(text, newline=None))
+    malformed = []
+    entries = list(_parse_lines(lines, 1, malformed))
+    return entries, malformed, len(lines)
+
+
+def read_catalog_parallel(path, workers=None):
+    """Returns every (title, video_id, tags) entry of a catalog.
+
+    The file is split on line boundaries and the chunks are parsed in a
+    pool of processes. Entries come back in file order, and malformed
+    lines are skipped with a CatalogWarning naming the line, exactly as in
+    read_catalog. Small files are read in this process.
+
+    Args:
+        path: The catalog file to read.
+        workers: The number of worker processes. Defaults to the number of
+            CPUs.
+    """
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or os.path.getsize(path) < _MIN_CHUNK_SIZE:
+        return list(read_catalog(path))
+    # A few chunks per worker keeps the pool busy if chunk costs differ.
+    bounds = _chunk_bounds(path, workers * 4)
+    entries = []
+    lines_before = 0
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        results = pool.map(_parse_chunk, *zip(*((path, start, end)
+                                               for start, end in bounds)))
+        for chunk_entries, malformed, line_count in results:
+            entries.extend(chunk_entries)
+            _warn_malformed(path, ((line_number + lines_before, line)
+                                   for line_number, line in malformed))
+            lines_before += line_count
+    return entries
+
+
+class MappedCatalog:
+    """A memory-mapped catalog file, indexed by video id.
+
+    Only the position of each line is recorded up front. A line is parsed
+    the first time its entry is asked for.
+    """
+
+    def __init__(self, path):
+        """Maps the catalog and records where each video's line is.
+
+        Args:
+            path: The catalog file to map.
+        """
+        # Maps a video id to the start and end of its line in _catalog. A
+        # later line with the same id wins, as in read_catalog.
+        self._offsets = {}
+        self._catalog = None
+        with open(path, "rb") as video_file:
+            if video_file.seek(0, 2) == 0:
+                # An empty file cannot be mapped, and has nothing to index.
+                return
+            self._catalog = mmap.mmap(
+                video_file.fileno(), 0, access=mmap.ACCESS_READ)
+        start = 0
+        size = len(self._catalog)
+        while start < size:
+            end = self._catalog.find(b"\n", start)
+            if end == -1:
+                end = size
+            video_id = self._line_video_id(self._catalog[start:end])
+            if video_id is not None:
+                self._offsets[video_id] = (start, end)
+            start = end + 1
+
+    @staticmethod
+    def _line_video_id(line):
+        """Returns the id of a catalog line, if _parse_lines accepts it.
+
+        Args:
+            line: The bytes of one line, without its line break.
+
+        Returns:
+            The stripped video id. None if the line is not made of three
+            fields.
+        """
+        if b'"' in line:
+            # A quoted field may hold the delimiter, so the line is split
+            # by the same csv rules as _parse_lines.
+            fields = next(csv.reader([line.decode("utf-8")], delimiter="|"),
+                          [])
+            return fields[1].strip() if len(fields) == 3 else None
+        fields = line.split(b"|")
+        return fields[1].strip().decode("utf-8") if len(fields) == 3 else None
+
+    def __len__(self):
+        return len(self._offsets)
+
+    def __iter__(self):
+        """Yields every (title, video_id, tags) entry, in catalog order."""
+        entries = (self.get(video_id) for video_id in self._offsets)
+        return (entry for entry in entries if entry is not None)
+
+    def get(self, video_id):
+        """Returns the (title, video_id, tags) entry for a video id.
+
+        Args:
+            video_id: The video id to look up.
+
+        Returns:
+            The parsed entry. None if the catalog has no such video, or its
+            line is malformed.
+        """
+        position = self._offsets.get(video_id)
+        if position is None:
+            return None
+        start, end = position
+        line = self._catalog[start:end].decode("utf-8")
+        malformed = []
+        # Line numbers are not tracked here, the offset locates the line.
+        entries = list(_parse_lines([line], 1, malformed))
+        for _, line in malformed:
+            warnings.warn(f"Skipping malformed line at byte {start} of the "
+                          f"catalog: {line!r}", CatalogWarning, stacklevel=2)
+        return entries[0] if entries else None
+
+    def close(self):
+        if self._catalog is not None:
+            self._catalog.close()
+            self._catalog = None
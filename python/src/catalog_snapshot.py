@@ -0,0 +1,236 @@
+"""A precompiled binary snapshot of the video catalog.
+
+A snapshot holds the same entries as a catalog text file, laid out so it
+can be loaded without parsing:
+
+    header       magic, byte order, the size, mtime and SHA-256 of the
+                 source catalog, and the length of every section below
+    records      six uint32 per video: title offset and length, id offset
+                 and length, first tag reference and number of tags
+    tags         two uint32 per distinct tag: offset and length
+    tag refs     one uint32 per video tag, indexing the tag table
+    id hash      open-addressed table of uint32 record index + 1, keyed by
+                 the CRC-32 of the video id, 0 marking an empty slot
+    strings      every title, id and distinct tag, UTF-8 encoded
+
+Integers are stored in the byte order of the machine that wrote the
+snapshot. A snapshot written on a different byte order is treated as stale.
+
+To compile a snapshot by hand:
+    python3 -m src.catalog_snapshot src/videos.txt videos.snapshot
+"""
+
+from .catalog import read_catalog
+from array import array
+import hashlib
+import os
+import struct
+import sys
+import zlib
+
+_MAGIC = b"YTSNAP01"
+_HEADER = struct.Struct("=8sBxxxQQ32sIIIII")
+_RECORD_FIELDS = 6
+_TAG_FIELDS = 2
+
+
+def _source_digest(source_path):
+    digest = hashlib.sha256()
+    with open(source_path, "rb") as source_file:
+        for block in iter(lambda: source_file.read(1 << 20), b""):
+            digest.update(block)
+    return digest.digest()
+
+
+def _hash_slot(video_id_bytes, slot_count):
+    return zlib.crc32(video_id_bytes) & (slot_count - 1)
+
+
+def write_snapshot(entries, snapshot_path, source_path):
+    """Writes a snapshot of catalog entries.
+
+    The file is written next to its destination and renamed into place, so
+    readers never see a partial snapshot.
+
+    Args:
+        entries: The (title, video_id, tags) entries to store. A later
+            entry with the same id wins.
+        snapshot_path: Where to write the snapshot.
+        source_path: The catalog file the entries were read from. Its
+            size, mtime and hash are recorded to detect staleness.
+    """
+    # Stat before reading, so a catalog changed mid-compile reads as stale.
+    stat = os.stat(source_path)
+    entries = {entry[1]: entry for entry in entries}
+    strings = bytearray()
+    string_offsets = {}
+
+    def add_string(text):
+        data = text.encode("utf-8")
+        offset = string_offsets.get(data)
+        if offset is None:
+            offset = string_offsets[data] = len(strings)
+            strings.extend(data)
+        return offset, len(data)
+
+    tag_ids = {}
+    tag_table = []
+    tag_refs = []
+    records = []
+    for title, video_id, tags in entries.values():
+        records.extend(add_string(title))
+        records.extend(add_string(video_id))
+        records.extend((len(tag_refs), len(tags)))
+        for tag in tags:
+            if tag not in tag_ids:
+                tag_ids[tag] = len(tag_table) // _TAG_FIELDS
+                tag_table.extend(add_string(tag))
+            tag_refs.append(tag_ids[tag])
+
+    slot_count = 1
+    while slot_count < 2 * len(entries):
+        slot_count *= 2
+    slots = [0] * slot_count
+    for index, video_id in enumerate(entries):
+        slot = _hash_slot(video_id.encode("utf-8"), slot_count)
+        while slots[slot]:
+            slot = (slot + 1) & (slot_count - 1)
+        slots[slot] = index + 1
+
+    header = _HEADER.pack(
+        _MAGIC, sys.byteorder == "little", stat.st_size, stat.st_mtime_ns,
+        _source_digest(source_path), len(entries), len(tag_table) // _TAG_FIELDS,
+        len(tag_refs), slot_count, len(strings))
+    temp_path = f"{snapshot_path}.tmp"
+    with open(temp_path, "wb") as snapshot_file:
+        snapshot_file.write(header)
+        for table in (records, tag_table, tag_refs, slots):
+            snapshot_file.write(array("I", table).tobytes())
+        snapshot_file.write(strings)
+    os.replace(temp_path, snapshot_path)
+
+
+class CatalogSnapshot:
+    """A loaded snapshot, read in place and indexed by video id.
+
+    Entries are decoded from the snapshot bytes when asked for, so loading
+    costs one read of the file and no per-video work.
+    """
+
+    def __init__(self, snapshot_path):
+        """Loads a snapshot file.
+
+        Args:
+            snapshot_path: The snapshot to load.
+
+        Raises:
+            ValueError: The file is not a snapshot this code can read.
+        """
+        with open(snapshot_path, "rb") as snapshot_file:
+            data = memoryview(snapshot_file.read())
+        if len(data) < _HEADER.size:
+            raise ValueError("Snapshot is truncated")
+        (magic, little_endian, self.source_size, self.source_mtime_ns,
+         self.source_digest, video_count, tag_count, ref_count, slot_count,
+         strings_size) = _HEADER.unpack_from(data)
+        if magic != _MAGIC or bool(little_endian) != (sys.byteorder == "little"):
+            raise ValueError("Not a snapshot for this machine")
+        sizes = (video_count * _RECORD_FIELDS, tag_count * _TAG_FIELDS,
+                 ref_count, slot_count)
+        if len(data) != _HEADER.size + 4 * sum(sizes) + strings_size:
+            raise ValueError("Snapshot is truncated")
+        tables = []
+        offset = _HEADER.size
+        for size in sizes:
+            tables.append(data[offset:offset + 4 * size].cast("I"))
+            offset += 4 * size
+        self._records, tag_table, self._tag_refs, self._slots = tables
+        self._strings = data[offset:]
+        # Distinct tags are few, so they are decoded once and shared.
+        self._tags = [
+            sys.intern(self._string(tag_table[i], tag_table[i + 1]))
+            for i in range(0, len(tag_table), _TAG_FIELDS)]
+
+    def _string(self, offset, length):
+        return str(self._strings[offset:offset + length], "utf-8")
+
+    def _entry(self, index):
+        (title_offset, title_length, id_offset, id_length, ref_start,
+         ref_count) = self._records[
+            index * _RECORD_FIELDS:(index + 1) * _RECORD_FIELDS]
+        return (
+            self._string(title_offset, title_length),
+            self._string(id_offset, id_length),
+            [self._tags[ref]
+             for ref in self._tag_refs[ref_start:ref_start + ref_count]],
+        )
+
+    def __len__(self):
+        return len(self._records) // _RECORD_FIELDS
+
+    def __iter__(self):
+        """Yields every (title, video_id, tags) entry, in catalog order."""
+        return (self._entry(index) for index in range(len(self)))
+
+    def get(self, video_id):
+        """Returns the (title, video_id, tags) entry for a video id.
+
+        Args:
+            video_id: The video id to look up.
+
+        Returns:
+            The entry. None if the snapshot has no such video.
+        """
+        id_bytes = video_id.encode("utf-8")
+        slot_count = len(self._slots)
+        slot = _hash_slot(id_bytes, slot_count)
+        while self._slots[slot]:
+            index = self._slots[slot] - 1
+            offset, length = self._records[
+                index * _RECORD_FIELDS + 2:index * _RECORD_FIELDS + 4]
+            if self._strings[offset:offset + length] == id_bytes:
+                return self._entry(index)
+            slot = (slot + 1) & (slot_count - 1)
+        return None
+
+    def is_fresh(self, source_path):
+        """Returns whether the snapshot still matches its source catalog.
+
+        A matching size and mtime is trusted. Otherwise the source is hashed,
+        so a touched but unchanged catalog does not force a rebuild.
+        """
+        stat = os.stat(source_path)
+        if stat.st_size != self.source_size:
+            return False
+        if stat.st_mtime_ns == self.source_mtime_ns:
+            return True
+        return _source_digest(source_path) == self.source_digest
+
+    def close(self):
+        pass
+
+
+def load_snapshot(snapshot_path, source_path):
+    """Loads a snapshot, compiling it first if it is missing or stale.
+
+    Args:
+        snapshot_path: The snapshot file.
+        source_path: The catalog file the snapshot is compiled from.
+
+    Returns:
+        A CatalogSnapshot that matches the current source catalog.
+    """
+    try:
+        snapshot = CatalogSnapshot(snapshot_path)
+        if snapshot.is_fresh(source_path):
+            return snapshot
+    except (OSError, ValueError):
+        pass
+    write_snapshot(read_catalog(source_path), snapshot_path, source_path)
+    return CatalogSnapshot(snapshot_path)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        sys.exit("Usage: python3 -m src.catalog_snapshot <catalog> <snapshot>")
+    write_snapshot(read_catalog(sys.argv[1]), sys.argv[2], sys.argv[1])
@@ -1,6 +1,8 @@
 """A command parser class."""
 
-import textwrap
+from collections import namedtuple
+import sys
+import time
 from typing import Sequence
 
 
@@ -9,14 +11,149 @@ class CommandException(Exception):
     pass
 
 
+# A registered command. handler is called with the CommandParser followed
+# by the command arguments, or is None for commands the caller handles
+# itself. arities is the tuple or range of accepted argument counts, None
+# meaning any count, with the arguments then dropped. usage is the message
+# raised for a wrong argument count, and help is the line shown by HELP.
+# completions holds what each argument names, VIDEO_ID or PLAYLIST_NAME,
+# for tab completion, or None for an argument that is not completed. If
+# repeat_last is set, every argument past the end of completions is
+# completed like the last one.
+Command = namedtuple("Command", ["handler", "arities", "usage", "help",
+                                 "completions", "repeat_last"])
+
+# The kinds of argument tab completion knows how to complete.
+VIDEO_ID = "video_id"
+PLAYLIST_NAME = "playlist_name"
+
+# Most completions offered for one word, so that a short prefix on a huge
+# catalog stays quick to complete.
+_COMPLETION_LIMIT = 100
+
+# Every known command, keyed by its upper case name, in HELP order.
+COMMANDS = {}
+
+
+def register_command(name, handler, help, arities=None, usage=None,
+                     completions=(), repeat_last=False):
+    """Registers a command with every CommandParser.
+
+    Args:
+        name: The command name. Commands are matched case-insensitively.
+        handler: Called with the CommandParser and the command arguments.
+            None registers a command the caller handles, such as EXIT,
+            so that it is listed by HELP.
+        help: The line describing the command in HELP.
+        arities: The accepted numbers of arguments, as a tuple or range.
+            None accepts any number and passes no arguments on.
+        usage: The message of the CommandException raised when the number
+            of arguments is not accepted.
+        completions: What each argument names, VIDEO_ID, PLAYLIST_NAME or
+            None, for tab completion.
+        repeat_last: If True, the last of completions also applies to any
+            further arguments, as for a command taking a list of video ids.
+    """
+    COMMANDS[name.upper()] = Command(handler, arities, usage, help,
+                                     tuple(completions), repeat_last)
+
+
+def _player_method(method_name):
+    """Returns a handler calling the named VideoPlayer method."""
+    def handler(parser, *args):
+        return getattr(parser.player, method_name)(*args)
+    return handler
+
+
+# The options a paged listing accepts after its other arguments.
+PAGING_OPTIONS = "[limit=<n>] [page=<n>|cursor=<cursor>]"
+
+
+def _parse_paging_options(options):
+    """Returns the limit, page and cursor keyword arguments of a listing.
+
+    Raises:
+        CommandException: An option is unknown, repeated or out of range,
+            or both a page and a cursor are given.
+    """
+    paging = {}
+    for option in options:
+        name, _, value = option.partition("=")
+        name = name.lower()
+        if name not in ("limit", "page", "cursor") or not value \
+                or name in paging:
+            raise CommandException(
+                f"Please enter paging options as {PAGING_OPTIONS}.")
+        if name == "cursor":
+            paging[name] = value
+        elif value.isdigit() and int(value) > 0:
+            paging[name] = int(value)
+        else:
+            raise CommandException(
+                f"Please enter a positive number for {name}.")
+    if "page" in paging and "cursor" in paging:
+        raise CommandException("Please enter either a page or a cursor.")
+    return paging
+
+
+def _paged_player_method(method_name, argument_count):
+    """Returns a handler calling a VideoPlayer listing method.
+
+    The first argument_count arguments are passed on as they are, and any
+    after them are parsed as paging options.
+    """
+    def handler(parser, *args):
+        paging = _parse_paging_options(args[argument_count:])
+        return getattr(parser.player, method_name)(
+            *args[:argument_count], **paging)
+    return handler
+
+
+def _bulk_flag_video(parser, *args):
+    """Runs BULK_FLAG_VIDEO, whose last argument may be reason=<reason>."""
+    flag_reason = "Not supplied"
+    if args[-1].lower().startswith("reason="):
+        flag_reason = args[-1][len("reason="):]
+        args = args[:-1]
+    if not args or not flag_reason:
+        raise CommandException(COMMANDS["BULK_FLAG_VIDEO"].usage)
+    parser.player.bulk_flag_video(*args, flag_reason=flag_reason)
+
+
 class CommandParser:
     """A class used to parse and execute a user Command."""
 
-    def __init__(self, video_player):
+    def __init__(self, video_player, output=None, stats=None):
+        """The CommandParser class is initialized.
+
+        Args:
+            video_player: The VideoPlayer commands are run against.
+            output: The OutputSink the parser's own messages are written
+                to. Defaults to the player's sink.
+            stats: A CommandStats every known command's latency is
+                recorded in. Without one, commands are not timed.
+        """
         self._player = video_player
+        self._out = output if output is not None else video_player.output
+        self._stats = stats
+
+    @property
+    def player(self):
+        """Returns the VideoPlayer commands are run against."""
+        return self._player
+
+    @property
+    def output(self):
+        """Returns the OutputSink the parser writes to."""
+        return self._out
+
+    @property
+    def stats(self):
+        """Returns the CommandStats commands are timed in, or None."""
+        return self._stats
 
     def execute_command(self, command: Sequence[str]):
-        """Executes the user command. Expects the command to be upper case.
+        """Executes the user command. The command name is case-insensitive.
            Raises CommandException if a command cannot be parsed.
         """
         if not command:
@@ -24,140 +161,218 @@ class CommandParser:
                 "Please enter a valid command, "
                 "type HELP for a list of available commands.")
 
-        if command[0].upper() == "NUMBER_OF_VIDEOS":
-            self._player.number_of_videos()
-
-        elif command[0].upper() == "SHOW_ALL_VIDEOS":
-            self._player.show_all_videos()
-
-        elif command[0].upper() == "PLAY":
-            if len(command) != 2:
-                raise CommandException(
-                    "Please enter PLAY command followed by video_id.")
-            self._player.play_video(command[1])
-
-        elif command[0].upper() == "PLAY_RANDOM":
-            self._player.play_random_video()
-
-        elif command[0].upper() == "STOP":
-            self._player.stop_video()
-
-        elif command[0].upper() == "PAUSE":
-            self._player.pause_video()
-
-        elif command[0].upper() == "CONTINUE":
-            self._player.continue_video()
-
-        elif command[0].upper() == "SHOW_PLAYING":
-            self._player.show_playing()
-
-        elif command[0].upper() == "CREATE_PLAYLIST":
-            if len(command) != 2:
-                raise CommandException(
-                    "Please enter CREATE_PLAYLIST command followed by a "
-                    "playlist name.")
-            self._player.create_playlist(command[1])
-
-        elif command[0].upper() == "ADD_TO_PLAYLIST":
-            if len(command) != 3:
-                raise CommandException(
-                    "Please enter ADD_TO_PLAYLIST command followed by a "
-                    "playlist name and video_id to add.")
-            self._player.add_to_playlist(command[1], command[2])
-
-        elif command[0].upper() == "REMOVE_FROM_PLAYLIST":
-            if len(command) != 3:
-                raise CommandException(
-                    "Please enter REMOVE_FROM_PLAYLIST command followed by a "
-                    "playlist name and video_id to remove.")
-            self._player.remove_from_playlist(command[1], command[2])
-
-        elif command[0].upper() == "CLEAR_PLAYLIST":
-            if len(command) != 2:
-                raise CommandException(
-                    "Please enter CLEAR_PLAYLIST command followed by a "
-                    "playlist name.")
-            self._player.clear_playlist(command[1])
-
-        elif command[0].upper() == "DELETE_PLAYLIST":
-            if len(command) != 2:
-                raise CommandException(
-                    "Please enter DELETE_PLAYLIST command followed by a "
-                    "playlist name.")
-            self._player.delete_playlist(command[1])
-
-        elif command[0].upper() == "SHOW_PLAYLIST":
-            if len(command) != 2:
-                raise CommandException(
-                    "Please enter SHOW_PLAYLIST command followed by a "
-                    "playlist name.")
-            self._player.show_playlist(command[1])
-
-        elif command[0].upper() == "SHOW_ALL_PLAYLISTS":
-            self._player.show_all_playlists()
-
-        elif command[0].upper() == "SEARCH_VIDEOS":
-            if len(command) != 2:
-                raise CommandException(
-                    "Please enter SEARCH_VIDEOS command followed by a "
-                    "search term.")
-            self._player.search_videos(command[1])
-
-        elif command[0].upper() == "SEARCH_VIDEOS_WITH_TAG":
-            if len(command) != 2:
-                raise CommandException(
-                    "Please enter SEARCH_VIDEOS_WITH_TAG command followed by a "
-                    "video tag.")
-            self._player.search_videos_tag(command[1])
-
-        elif command[0].upper() == "FLAG_VIDEO":
-            if len(command) == 3:
-                self._player.flag_video(command[1], command[2])
-            elif len(command) == 2:
-                self._player.flag_video(command[1])
-            else:
-                raise CommandException(
-                    "Please enter FLAG_VIDEO command followed by a "
-                    "video_id and an optional flag reason.")
-
-        elif command[0].upper() == "ALLOW_VIDEO":
-            if len(command) != 2:
-                raise CommandException(
-                    "Please enter ALLOW_VIDEO command followed by a "
-                    "video_id.")
-            self._player.allow_video(command[1])
-
-        elif command[0].upper() == "HELP":
-            self._get_help()
-        else:
-            print(
+        name = command[0].upper()
+        spec = COMMANDS.get(name)
+        if spec is None:
+            self._out.write(
                 "Please enter a valid command, type HELP for a list of "
                 "available commands.")
+            return
+        if self._stats is None:
+            self._run(spec, command[1:])
+            return
+        start = time.perf_counter_ns()
+        try:
+            self._run(spec, command[1:])
+        finally:
+            self._stats.record(name, time.perf_counter_ns() - start)
+
+    def _run(self, spec, args):
+        """Checks the arguments of a known command and runs it."""
+        if spec.arities is None:
+            args = ()
+        elif len(args) not in spec.arities:
+            raise CommandException(spec.usage)
+        if spec.handler is not None:
+            spec.handler(self, *args)
+
+    def completions(self, words, text):
+        """Returns the ways to complete the word being typed in a command.
+
+        The first word completes to a command name, and the arguments of a
+        command to video ids or playlist names as the command registered.
+
+        Args:
+            words: The words typed before the one being completed.
+            text: The start of the word being completed.
+
+        Returns:
+            A list of whole words starting with text.
+        """
+        if not words:
+            return [name for name in COMMANDS if name.startswith(text.upper())]
+        spec = COMMANDS.get(words[0].upper())
+        position = len(words) - 1
+        if spec is None or not spec.completions:
+            return []
+        if position >= len(spec.completions):
+            if not spec.repeat_last:
+                return []
+            position = len(spec.completions) - 1
+        kind = spec.completions[position]
+        if kind == VIDEO_ID:
+            return self._player.complete_video_ids(text, _COMPLETION_LIMIT)
+        if kind == PLAYLIST_NAME:
+            return self._player.complete_playlists(text, _COMPLETION_LIMIT)
+        return []
 
     def _get_help(self):
         """Displays all available commands to the user."""
-        help_text = textwrap.dedent("""
-        Available commands:
-            NUMBER_OF_VIDEOS - Shows how many videos are in the library.
-            SHOW_ALL_VIDEOS - Lists all videos from the library.
-            PLAY <video_id> - Plays specified video.
-            PLAY_RANDOM - Plays a random video from the library.
-            STOP - Stop the current video.
-            PAUSE - Pause the current video.
-            CONTINUE - Resume the current paused video.
-            SHOW_PLAYING - Displays the title, url and paused status of the video that is currently playing (or paused).
-            CREATE_PLAYLIST <playlist_name> - Creates a new (empty) playlist with the provided name.
-            ADD_TO_PLAYLIST <playlist_name> <video_id> - Adds the requested video to the playlist.
-            REMOVE_FROM_PLAYLIST <playlist_name> <video_id> - Removes the specified video from the specified playlist
-            CLEAR_PLAYLIST <playlist_name> - Removes all the videos from the playlist.
-            DELETE_PLAYLIST <playlist_name> - Deletes the playlist.
-            SHOW_PLAYLIST <playlist_name> - List all the videos in this playlist.
-            SHOW_ALL_PLAYLISTS - Display all the available playlists.
-            SEARCH_VIDEOS <search_term> - Display all the videos whose titles contain the search_term.
-            SEARCH_VIDEOS_WITH_TAG <tag_name> -Display all videos whose tags contains the provided tag.
-            FLAG_VIDEO <video_id> <flag_reason> - Mark a video as flagged.
-            ALLOW_VIDEO <video_id> - Removes a flag from a video.
-            HELP - Displays help.
-            EXIT - Terminates the program execution.
-        """)
-        print(help_text)
+        help_lines = [""]
+        help_lines.append("Available commands:")
+        help_lines.extend(f"    {spec.help}" for spec in COMMANDS.values())
+        help_lines.append("")
+        self._out.write("\n".join(help_lines))
+
+    def _show_stats(self, output_format="TEXT"):
+        """Displays the statistics collected so far."""
+        output_format = output_format.upper()
+        if output_format not in ("TEXT", "JSON"):
+            raise CommandException(
+                "Please enter STATS command optionally followed by TEXT or "
+                "JSON.")
+        if self._stats is None:
+            self._out.write("Statistics are not being collected.")
+        elif output_format == "JSON":
+            self._out.write(self._stats.to_json())
+        else:
+            self._out.write_lines(self._stats.format_lines())
+
+
+register_command(
+    "NUMBER_OF_VIDEOS", _player_method("number_of_videos"),
+    "NUMBER_OF_VIDEOS - Shows how many videos are in the library.")
+register_command(
+    "SHOW_ALL_VIDEOS", _paged_player_method("show_all_videos", 0),
+    f"SHOW_ALL_VIDEOS {PAGING_OPTIONS} - Lists all videos from the library.",
+    range(0, 3), f"Please enter SHOW_ALL_VIDEOS command optionally followed "
+    f"by {PAGING_OPTIONS}.")
+register_command(
+    "PLAY", _player_method("play_video"),
+    "PLAY <video_id> - Plays specified video.",
+    (1,), "Please enter PLAY command followed by video_id.", (VIDEO_ID,))
+register_command(
+    "PLAY_RANDOM", _player_method("play_random_video"),
+    "PLAY_RANDOM - Plays a random video from the library.")
+register_command(
+    "STOP", _player_method("stop_video"),
+    "STOP - Stop the current video.")
+register_command(
+    "PAUSE", _player_method("pause_video"),
+    "PAUSE - Pause the current video.")
+register_command(
+    "CONTINUE", _player_method("continue_video"),
+    "CONTINUE - Resume the current paused video.")
+register_command(
+    "SHOW_PLAYING", _player_method("show_playing"),
+    "SHOW_PLAYING - Displays the title, url and paused status of the video "
+    "that is currently playing (or paused).")
+register_command(
+    "CREATE_PLAYLIST", _player_method("create_playlist"),
+    "CREATE_PLAYLIST <playlist_name> - Creates a new (empty) playlist with "
+    "the provided name.",
+    (1,), "Please enter CREATE_PLAYLIST command followed by a playlist name.")
+register_command(
+    "ADD_TO_PLAYLIST", _player_method("add_to_playlist"),
+    "ADD_TO_PLAYLIST <playlist_name> <video_id> - Adds the requested video "
+    "to the playlist.",
+    (2,), "Please enter ADD_TO_PLAYLIST command followed by a playlist name "
+    "and video_id to add.", (PLAYLIST_NAME, VIDEO_ID))
+register_command(
+    "REMOVE_FROM_PLAYLIST", _player_method("remove_from_playlist"),
+    "REMOVE_FROM_PLAYLIST <playlist_name> <video_id> - Removes the "
+    "specified video from the specified playlist",
+    (2,), "Please enter REMOVE_FROM_PLAYLIST command followed by a playlist "
+    "name and video_id to remove.", (PLAYLIST_NAME, VIDEO_ID))
+register_command(
+    "CLEAR_PLAYLIST", _player_method("clear_playlist"),
+    "CLEAR_PLAYLIST <playlist_name> - Removes all the videos from the "
+    "playlist.",
+    (1,), "Please enter CLEAR_PLAYLIST command followed by a playlist name.",
+    (PLAYLIST_NAME,))
+register_command(
+    "DELETE_PLAYLIST", _player_method("delete_playlist"),
+    "DELETE_PLAYLIST <playlist_name> - Deletes the playlist.",
+    (1,), "Please enter DELETE_PLAYLIST command followed by a playlist name.",
+    (PLAYLIST_NAME,))
+register_command(
+    "BULK_ADD_TO_PLAYLIST", _player_method("bulk_add_to_playlist"),
+    "BULK_ADD_TO_PLAYLIST <playlist_name> <video_id> [<video_id> ...] - Adds "
+    "the requested videos to the playlist.",
+    range(2, sys.maxsize), "Please enter BULK_ADD_TO_PLAYLIST command followed "
+    "by a playlist name and one or more video_ids to add.",
+    (PLAYLIST_NAME, VIDEO_ID), repeat_last=True)
+register_command(
+    "SHOW_PLAYLIST", _paged_player_method("show_playlist", 1),
+    f"SHOW_PLAYLIST <playlist_name> {PAGING_OPTIONS} - List all the videos in "
+    f"this playlist.",
+    range(1, 4), "Please enter SHOW_PLAYLIST command followed by a playlist "
+    "name.", (PLAYLIST_NAME,))
+register_command(
+    "SHOW_ALL_PLAYLISTS", _player_method("show_all_playlists"),
+    "SHOW_ALL_PLAYLISTS - Display all the available playlists.")
+register_command(
+    "SEARCH_VIDEOS", _paged_player_method("search_videos", 1),
+    f"SEARCH_VIDEOS <search_term> {PAGING_OPTIONS} - Display all the videos "
+    f"whose titles contain the search_term.",
+    range(1, 4), "Please enter SEARCH_VIDEOS command followed by a search "
+    "term.")
+register_command(
+    "SEARCH_VIDEOS_WITH_TAG", _paged_player_method("search_videos_tag", 1),
+    f"SEARCH_VIDEOS_WITH_TAG <tag_name> {PAGING_OPTIONS} -Display all videos "
+    f"whose tags contains the provided tag.",
+    range(1, 4), "Please enter SEARCH_VIDEOS_WITH_TAG command followed by a "
+    "video tag.")
+register_command(
+    "SEARCH_RANKED", _player_method("search_videos_ranked"),
+    "SEARCH_RANKED <term> [<term> ...] - Display the videos whose titles and "
+    "tags best match the terms, best first.",
+    range(1, sys.maxsize), "Please enter SEARCH_RANKED command followed by "
+    "one or more search terms.")
+register_command(
+    "SEARCH_FUZZY", _player_method("search_videos_fuzzy"),
+    "SEARCH_FUZZY <term> [<term> ...] - Display the videos whose titles "
+    "nearly match the terms, even if misspelled, closest first.",
+    range(1, sys.maxsize), "Please enter SEARCH_FUZZY command followed by "
+    "one or more search terms.")
+register_command(
+    "FLAG_VIDEO", _player_method("flag_video"),
+    "FLAG_VIDEO <video_id> <flag_reason> - Mark a video as flagged.",
+    (1, 2), "Please enter FLAG_VIDEO command followed by a video_id and an "
+    "optional flag reason.", (VIDEO_ID,))
+register_command(
+    "ALLOW_VIDEO", _player_method("allow_video"),
+    "ALLOW_VIDEO <video_id> - Removes a flag from a video.",
+    (1,), "Please enter ALLOW_VIDEO command followed by a video_id.",
+    (VIDEO_ID,))
+register_command(
+    "BULK_FLAG_VIDEO", _bulk_flag_video,
+    "BULK_FLAG_VIDEO <video_id> [<video_id> ...] [reason=<flag_reason>] - "
+    "Mark several videos as flagged.",
+    range(1, sys.maxsize), "Please enter BULK_FLAG_VIDEO command followed by "
+    "one or more video_ids and an optional reason=<flag_reason>.",
+    (VIDEO_ID,), repeat_last=True)
+register_command(
+    "BULK_ALLOW_VIDEO", _player_method("bulk_allow_video"),
+    "BULK_ALLOW_VIDEO <video_id> [<video_id> ...] - Removes the flags from "
+    "several videos.",
+    range(1, sys.maxsize), "Please enter BULK_ALLOW_VIDEO command followed by "
+    "one or more video_ids.",
+    (VIDEO_ID,), repeat_last=True)
+register_command(
+    "COMPLETE", _player_method("complete"),
+    "COMPLETE <prefix> - Lists the video ids, titles and playlist names "
+    "starting with the prefix.",
+    range(1, sys.maxsize), "Please enter COMPLETE command followed by a "
+    "prefix.")
+register_command(
+    "STATS", lambda parser, *args: parser._show_stats(*args),
+    "STATS [TEXT|JSON] - Displays command latencies and index and cache hit "
+    "rates.",
+    (0, 1), "Please enter STATS command optionally followed by TEXT or JSON.")
+register_command(
+    "HELP", lambda parser: parser._get_help(),
+    "HELP - Displays help.")
+register_command(
+    "EXIT", None,
+    "EXIT - Terminates the program execution.")
@@ -0,0 +1,121 @@
+"""Edit distance and a BK-tree for finding nearly matching words."""
+
+
+class _Pattern:
+    """A word prepared for measuring its edit distance to many others.
+
+    Distances are computed with Myers' bit-parallel algorithm, which keeps
+    a column of the edit distance table in the bits of two integers. Each
+    character of the other word then costs a few integer operations rather
+    than a pass over the pattern.
+    """
+
+    __slots__ = ("_length", "_masks")
+
+    def __init__(self, word):
+        self._length = len(word)
+        # Bit i of a character's mask is set where word[i] is that character.
+        self._masks = {}
+        bit = 1
+        for char in word:
+            self._masks[char] = self._masks.get(char, 0) | bit
+            bit <<= 1
+
+    def distance(self, text):
+        """Returns the Levenshtein distance between the pattern and text."""
+        length = self._length
+        if not length:
+            return len(text)
+        full = (1 << length) - 1
+        last = 1 << (length - 1)
+        masks = self._masks
+        # The vertical positive and negative deltas of the current column.
+        positive, negative, score = full, 0, length
+        for char in text:
+            equal = masks.get(char, 0)
+            vertical = equal | negative
+            horizontal = (((equal & positive) + positive) ^ positive) | equal
+            up = negative | (~(horizontal | positive) & full)
+            down = positive & horizontal
+            if up & last:
+                score += 1
+            elif down & last:
+                score -= 1
+            up = ((up << 1) | 1) & full
+            down = (down << 1) & full
+            positive = down | (~(vertical | up) & full)
+            negative = up & vertical
+        return score
+
+
+def edit_distance(first, second):
+    """Returns the Levenshtein distance between two strings.
+
+    The distance is the fewest single character insertions, deletions and
+    substitutions turning one string into the other.
+    """
+    return _Pattern(first).distance(second)
+
+
+class BKTree:
+    """A class used to represent a set of words searchable by edit distance.
+
+    Each node keeps its children by their distance to it. By the triangle
+    inequality, only children whose distance is within max_distance of the
+    query's own distance to the node can hold a match, so a search visits
+    a small part of the tree.
+    """
+
+    def __init__(self, words=()):
+        # A node is a [word, {distance: child node}] list.
+        self._root = None
+        self._size = 0
+        for word in words:
+            self.add(word)
+
+    def __len__(self):
+        return self._size
+
+    def add(self, word):
+        """Adds a word. Adding a word already in the tree does nothing."""
+        if self._root is None:
+            self._root = [word, {}]
+            self._size = 1
+            return
+        pattern = _Pattern(word)
+        node = self._root
+        while True:
+            distance = pattern.distance(node[0])
+            if distance == 0:
+                return
+            child = node[1].get(distance)
+            if child is None:
+                node[1][distance] = [word, {}]
+                self._size += 1
+                return
+            node = child
+
+    def search(self, word, max_distance):
+        """Returns the words within an edit distance of word.
+
+        Args:
+            word: The word to match.
+            max_distance: The largest edit distance allowed.
+
+        Returns:
+            A dict mapping each matching word to its distance from word.
+        """
+        matches = {}
+        if self._root is None:
+            return matches
+        pattern = _Pattern(word)
+        nodes = [self._root]
+        while nodes:
+            node_word, children = nodes.pop()
+            distance = pattern.distance(node_word)
+            if distance <= max_distance:
+                matches[node_word] = distance
+            for child_distance, child in children.items():
+                if abs(child_distance - distance) <= max_distance:
+                    nodes.append(child)
+        return matches
@@ -0,0 +1,77 @@
+"""A durable journal of the flags set on videos."""
+
+from .record_log import RecordLog
+import threading
+
+# Record types, the first field of every record.
+_FLAG = "F"
+_ALLOW = "A"
+
+
+class ModerationJournal:
+    """A class used to persist video flags across runs of the player.
+
+    Flag changes are appended to a RecordLog and committed in groups, so
+    flagging at a high rate does not cost an fsync per video. The log is
+    compacted into a snapshot of the flagged videos once it holds more
+    records than twice their number.
+    """
+
+    def __init__(self, path, compact_min=10000, sync_interval=0.05):
+        """Opens the journal and replays its snapshot and log.
+
+        Args:
+            path: The path the journal's file names start with.
+            compact_min: The fewest log records that trigger a compaction.
+            sync_interval: The longest time in seconds a flag change waits
+                before it is written to disk with its group.
+        """
+        self._log = RecordLog(path, sync_interval=sync_interval)
+        self._compact_min = compact_min
+        # Maps the id of every flagged video to its flag reason.
+        self._flags = {}
+        # Flag changes may come from several threads at once.
+        self._lock = threading.Lock()
+        for record in self._log.replay():
+            self._apply(record)
+
+    def _apply(self, record):
+        if record[0] == _FLAG:
+            self._flags[record[1]] = record[2]
+        elif record[0] == _ALLOW:
+            self._flags.pop(record[1], None)
+
+    def _record(self, *fields):
+        with self._lock:
+            self._apply(fields)
+            self._log.append(*fields)
+            if self._log.log_count > max(self._compact_min,
+                                         2 * len(self._flags)):
+                self._compact()
+
+    def flags(self):
+        """Returns a list of (video_id, flag_reason) for the flagged videos."""
+        with self._lock:
+            return list(self._flags.items())
+
+    def flagged(self, video_id, flag_reason):
+        """Records that a video was flagged."""
+        self._record(_FLAG, video_id, flag_reason)
+
+    def allowed(self, video_id):
+        """Records that the flag was removed from a video."""
+        self._record(_ALLOW, video_id)
+
+    def compact(self):
+        """Rewrites the flagged videos as a snapshot and empties the log."""
+        with self._lock:
+            self._compact()
+
+    def _compact(self):
+        self._log.compact(
+            [(_FLAG, video_id, reason)
+             for video_id, reason in self._flags.items()])
+
+    def close(self):
+        """Writes any pending flag changes to disk and closes the journal."""
+        self._log.close()
@@ -0,0 +1,92 @@
+"""Output sinks the video player writes its lines to."""
+
+from abc import ABC
+from abc import abstractmethod
+from collections import deque
+import sys
+
+
+class OutputSink(ABC):
+    """A class used to represent where output lines are sent.
+
+    Subclasses implement write. Lines are given without their trailing
+    newline.
+    """
+
+    @abstractmethod
+    def write(self, line):
+        """Writes one line."""
+
+    def write_lines(self, lines):
+        """Writes several lines, as one write where the sink allows it."""
+        for line in lines:
+            self.write(line)
+
+    def flush(self):
+        """Sends on anything the sink is holding back."""
+        pass
+
+
+class StdoutSink(OutputSink):
+    """Writes each call straight to the current sys.stdout, like print."""
+
+    def write(self, line):
+        sys.stdout.write(f"{line}\n")
+
+    def write_lines(self, lines):
+        sys.stdout.write("".join(f"{line}\n" for line in lines))
+
+    def flush(self):
+        sys.stdout.flush()
+
+
+class BufferedSink(OutputSink):
+    """Holds lines in memory until flush writes them out in one go."""
+
+    def __init__(self, stream=None):
+        """The BufferedSink class is initialized.
+
+        Args:
+            stream: The file object flushed lines go to. Defaults to the
+                sys.stdout current at flush time.
+        """
+        self._stream = stream
+        self._lines = []
+
+    def write(self, line):
+        self._lines.append(line)
+
+    def write_lines(self, lines):
+        self._lines.extend(lines)
+
+    def flush(self):
+        stream = self._stream or sys.stdout
+        if self._lines:
+            stream.write("".join(f"{line}\n" for line in self._lines))
+            self._lines.clear()
+        stream.flush()
+
+
+class ListSink(OutputSink):
+    """Collects lines in a list, for tests and callers that post-process."""
+
+    def __init__(self):
+        self.lines = []
+
+    def write(self, line):
+        self.lines.append(line)
+
+    def write_lines(self, lines):
+        self.lines.extend(lines)
+
+
+class NullSink(OutputSink):
+    """Discards every line, so benchmarks measure no terminal I/O."""
+
+    def write(self, line):
+        pass
+
+    def write_lines(self, lines):
+        # Lines may be generated lazily, so they are still produced to
+        # keep the cost of building them.
+        deque(lines, maxlen=0)
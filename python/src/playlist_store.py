@@ -0,0 +1,105 @@
+"""A durable store for the video player's playlists."""
+
+from .record_log import RecordLog
+
+# Record types, the first field of every record.
+_CREATE = "C"
+_ADD = "A"
+_REMOVE = "R"
+_CLEAR = "X"
+_DELETE = "D"
+
+
+class PlaylistStore:
+    """A class used to persist playlists across runs of the player.
+
+    Every change is appended to a RecordLog. Once the log holds more
+    records than twice the live state, the state is compacted into a
+    snapshot, so reopening the store costs time proportional to the
+    playlists themselves rather than to their history.
+    """
+
+    def __init__(self, path, compact_min=10000, sync_interval=0.05):
+        """Opens the store and replays its snapshot and log.
+
+        Args:
+            path: The path the store's file names start with.
+            compact_min: The fewest log records that trigger a compaction.
+            sync_interval: The longest time in seconds a change waits
+                before it is written to disk with its group.
+        """
+        self._log = RecordLog(path, sync_interval=sync_interval)
+        self._compact_min = compact_min
+        # Maps an upper case playlist name to its title and a dict whose
+        # keys are the playlist's video ids, in the order they were added.
+        self._playlists = {}
+        self._size = 0
+        for record in self._log.replay():
+            self._apply(record)
+
+    def _apply(self, record):
+        kind, title = record[0], record[1]
+        name = title.upper()
+        if kind == _CREATE:
+            if name not in self._playlists:
+                self._playlists[name] = (title, {})
+                self._size += 1
+            return
+        if name not in self._playlists:
+            return
+        video_ids = self._playlists[name][1]
+        if kind == _ADD and record[2] not in video_ids:
+            video_ids[record[2]] = None
+            self._size += 1
+        elif kind == _REMOVE and record[2] in video_ids:
+            del video_ids[record[2]]
+            self._size -= 1
+        elif kind == _CLEAR:
+            self._size -= len(video_ids)
+            video_ids.clear()
+        elif kind == _DELETE:
+            self._size -= len(video_ids) + 1
+            del self._playlists[name]
+
+    def _record(self, *fields):
+        self._apply(fields)
+        self._log.append(*fields)
+        if self._log.log_count > max(self._compact_min, 2 * self._size):
+            self.compact()
+
+    def playlists(self):
+        """Yields the title and video ids of each stored playlist."""
+        for title, video_ids in self._playlists.values():
+            yield title, list(video_ids)
+
+    def created(self, title):
+        """Records that a playlist was created."""
+        self._record(_CREATE, title)
+
+    def added(self, title, video_id):
+        """Records that a video was added to a playlist."""
+        self._record(_ADD, title, video_id)
+
+    def removed(self, title, video_id):
+        """Records that a video was removed from a playlist."""
+        self._record(_REMOVE, title, video_id)
+
+    def cleared(self, title):
+        """Records that every video was removed from a playlist."""
+        self._record(_CLEAR, title)
+
+    def deleted(self, title):
+        """Records that a playlist was deleted."""
+        self._record(_DELETE, title)
+
+    def compact(self):
+        """Rewrites the stored state as a snapshot and empties the log."""
+        records = []
+        for title, video_ids in self._playlists.values():
+            records.append((_CREATE, title))
+            records.extend((_ADD, title, video_id) for video_id in video_ids)
+        self._log.compact(records)
+
+    def close(self):
+        """Writes any pending changes to disk and closes the store."""
+        self._log.close()
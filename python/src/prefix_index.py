@@ -0,0 +1,76 @@
+"""A sorted array index for completing names from a prefix."""
+
+from bisect import bisect_left
+
+
+class PrefixIndex:
+    """A class used to represent a set of names completable by prefix.
+
+    Names are kept sorted by their lower case form in a plain list, so a
+    lookup is one binary search followed by a walk over the matches, and
+    the index costs two list slots per name. Matching ignores case. A name
+    added more than once is listed once, until it is removed as many times.
+    """
+
+    def __init__(self, names=()):
+        self._counts = {}
+        for name in names:
+            self._counts[name] = self._counts.get(name, 0) + 1
+        pairs = sorted((name.lower(), name) for name in self._counts)
+        self._keys = [key for key, _ in pairs]
+        self._names = [name for _, name in pairs]
+
+    def __len__(self):
+        return len(self._names)
+
+    def add(self, name):
+        count = self._counts.get(name, 0)
+        self._counts[name] = count + 1
+        if count:
+            return
+        key = name.lower()
+        index = self._position(key, name)
+        self._keys.insert(index, key)
+        self._names.insert(index, name)
+
+    def remove(self, name):
+        count = self._counts.get(name)
+        if count is None:
+            return
+        if count > 1:
+            self._counts[name] = count - 1
+            return
+        del self._counts[name]
+        index = self._position(name.lower(), name)
+        del self._keys[index]
+        del self._names[index]
+
+    def _position(self, key, name):
+        """Returns where a name and its key are, or belong, in the lists."""
+        index = bisect_left(self._keys, key)
+        # Names differing only in case share a key, ordered among
+        # themselves by the name.
+        while (index < len(self._keys) and self._keys[index] == key
+               and self._names[index] < name):
+            index += 1
+        return index
+
+    def complete(self, prefix, limit=None):
+        """Returns the names starting with prefix, ignoring case.
+
+        Args:
+            prefix: The start of the names to find.
+            limit: The most names to return. None returns every match.
+
+        Returns:
+            A list of the matching names, ordered by their lower case form.
+        """
+        prefix = prefix.lower()
+        keys = self._keys
+        start = bisect_left(keys, prefix)
+        names = []
+        for index in range(start, len(keys)):
+            if not keys[index].startswith(prefix) or len(names) == limit:
+                break
+            names.append(self._names[index])
+        return names
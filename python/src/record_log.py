@@ -0,0 +1,196 @@
+"""An append-only record log with group commit and snapshot compaction.
+
+A log is kept in two files next to each other:
+
+    <path>.snapshot  the records making up the state at the last compaction
+    <path>.log       the records appended since then
+
+Each record is a tuple of strings written as one tab separated line, with
+backslashes, tabs and newlines escaped. Both files start with a generation
+line. Compaction writes a snapshot of the next generation before starting
+an empty log of that generation. If it is cut short in between, the old
+log is simply ignored on replay.
+"""
+
+import os
+import threading
+
+_UNESCAPES = {"\\": "\\", "t": "\t", "n": "\n", "r": "\r"}
+
+
+def _encode(fields):
+    return "\t".join(
+        field.replace("\\", "\\\\").replace("\t", "\\t")
+        .replace("\n", "\\n").replace("\r", "\\r")
+        for field in fields) + "\n"
+
+
+def _decode(line):
+    fields = []
+    for field in line.split("\t"):
+        if "\\" in field:
+            chars = iter(field)
+            field = "".join(
+                _UNESCAPES.get(next(chars, ""), "") if char == "\\" else char
+                for char in chars)
+        fields.append(field)
+    return tuple(fields)
+
+
+def _generation_line(generation):
+    return f"#generation {generation}\n"
+
+
+def _read_records(path):
+    """Returns the generation and records of a log or snapshot file.
+
+    Returns:
+        (None, []) if the file does not exist or has no generation line.
+        A last line without its newline was cut short by a crash, and is
+        dropped.
+    """
+    try:
+        with open(path, encoding="utf-8") as log_file:
+            lines = log_file.readlines()
+    except FileNotFoundError:
+        return None, []
+    if not lines or not lines[0].startswith("#generation ") \
+            or not lines[0].endswith("\n"):
+        return None, []
+    generation = int(lines[0].split()[1])
+    return generation, [_decode(line[:-1]) for line in lines[1:]
+                        if line.endswith("\n")]
+
+
+def _truncate_torn_tail(path):
+    """Cuts a log back to its last complete line, so appends stay whole."""
+    with open(path, "rb+") as log_file:
+        data = log_file.read()
+        if data and not data.endswith(b"\n"):
+            log_file.truncate(data.rfind(b"\n") + 1)
+
+
+def _write_atomically(path, lines):
+    temp_path = f"{path}.tmp"
+    with open(temp_path, "w", encoding="utf-8") as temp_file:
+        temp_file.writelines(lines)
+        temp_file.flush()
+        os.fsync(temp_file.fileno())
+    os.replace(temp_path, path)
+
+
+class RecordLog:
+    """A class used to represent a durable log of records.
+
+    Appends are buffered and committed as a group, with one fsync for
+    every record pending at that point. A commit happens once sync_batch
+    records are pending, sync_interval seconds after the first pending
+    record, on sync() and on close().
+    """
+
+    def __init__(self, path, sync_interval=0.05, sync_batch=1024):
+        """Opens the log, creating its files if needed.
+
+        Args:
+            path: The path the .snapshot and .log file names start with.
+            sync_interval: The longest time in seconds an appended record
+                waits before it is committed.
+            sync_batch: The number of pending records that forces a commit.
+        """
+        self._snapshot_path = f"{path}.snapshot"
+        self._log_path = f"{path}.log"
+        self._sync_interval = sync_interval
+        self._sync_batch = sync_batch
+        self._lock = threading.Lock()
+        self._pending = []
+        self._timer = None
+
+        self._generation, self._snapshot_records = _read_records(
+            self._snapshot_path)
+        log_generation, log_records = _read_records(self._log_path)
+        if self._generation is None:
+            self._generation = 0
+        if log_generation != self._generation:
+            # The log predates the snapshot, or is missing or damaged.
+            log_records = []
+            _write_atomically(self._log_path,
+                              [_generation_line(self._generation)])
+        else:
+            _truncate_torn_tail(self._log_path)
+        self._log_records = log_records
+        self._log_count = len(log_records)
+        self._log_file = open(self._log_path, "a", encoding="utf-8")
+
+    @property
+    def log_count(self):
+        """Returns the number of records appended since the last compaction."""
+        return self._log_count
+
+    def replay(self):
+        """Returns the records on disk when the log was opened.
+
+        The records are handed over rather than kept, so a second call
+        returns an empty list.
+
+        Returns:
+            The snapshot records followed by the log records, in order.
+            Records appended since opening are not included.
+        """
+        records = self._snapshot_records + self._log_records
+        self._snapshot_records = []
+        self._log_records = []
+        return records
+
+    def append(self, *fields):
+        """Appends a record of string fields, committed with its group."""
+        with self._lock:
+            self._pending.append(_encode(fields))
+            self._log_count += 1
+            if len(self._pending) >= self._sync_batch:
+                self._commit()
+            elif self._timer is None:
+                self._timer = threading.Timer(self._sync_interval, self.sync)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def _commit(self):
+        """Writes and fsyncs the pending records. Needs _lock held."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._pending or self._log_file.closed:
+            return
+        self._log_file.writelines(self._pending)
+        self._log_file.flush()
+        os.fsync(self._log_file.fileno())
+        self._pending.clear()
+
+    def sync(self):
+        """Commits every pending record now."""
+        with self._lock:
+            self._commit()
+
+    def compact(self, records):
+        """Replaces the snapshot and log with a snapshot of the given state.
+
+        Args:
+            records: The records that rebuild the current state when
+                replayed on their own.
+        """
+        with self._lock:
+            self._commit()
+            generation = self._generation + 1
+            _write_atomically(
+                self._snapshot_path,
+                [_generation_line(generation)] + [_encode(r) for r in records])
+            self._log_file.close()
+            _write_atomically(self._log_path, [_generation_line(generation)])
+            self._log_file = open(self._log_path, "a", encoding="utf-8")
+            self._generation = generation
+            self._log_count = 0
+
+    def close(self):
+        """Commits pending records and closes the log."""
+        with self._lock:
+            self._commit()
+            self._log_file.close()
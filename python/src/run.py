@@ -1,14 +1,56 @@
 """A youtube terminal simulator."""
+import argparse
+import sys
+
+from .app_state import AppState
+from .app_state import add_state_arguments
+from .output import BufferedSink
+from .output import StdoutSink
 from .video_player import VideoPlayer
 from .command_parser import CommandException
 from .command_parser import CommandParser
 
+try:
+    import readline
+except ImportError:
+    # readline is not available on every platform, such as Windows, where
+    # the prompt simply goes without tab completion.
+    readline = None
 
-if __name__ == "__main__":
+
+def _enable_completion(parser):
+    """Makes tab complete commands, video ids and playlist names."""
+    matches = []
+
+    def complete(text, state):
+        if state == 0:
+            words = readline.get_line_buffer()[:readline.get_begidx()].split()
+            matches[:] = parser.completions(words, text)
+        return matches[state] if state < len(matches) else None
+
+    readline.set_completer(complete)
+    readline.set_completer_delims(" \t\n")
+    if "libedit" in (readline.__doc__ or ""):
+        readline.parse_and_bind("bind ^I rl_complete")
+    else:
+        readline.parse_and_bind("tab: complete")
+
+
+def run_interactive(playlist_store=None, library=None, stats=None):
+    """Reads and runs commands typed by the user until EXIT.
+
+    Args:
+        playlist_store: An optional PlaylistStore to keep playlists in.
+        library: The VideoLibrary to play from. Defaults to a new library.
+        stats: An optional CommandStats to time commands in.
+    """
     print("""Hello and welcome to YouTube, what would you like to do?
     Enter HELP for list of available commands or EXIT to terminate.""")
-    video_player = VideoPlayer()
-    parser = CommandParser(video_player)
+    video_player = VideoPlayer(playlist_store=playlist_store, library=library)
+    output = video_player.output
+    parser = CommandParser(video_player, stats=stats)
+    if readline is not None:
+        _enable_completion(parser)
     while True:
         command = input("YT> ")
         if command.upper() == "EXIT":
@@ -16,6 +58,88 @@ if __name__ == "__main__":
         try:
             parser.execute_command(command.split())
         except CommandException as e:
-            print(e)
+            output.write(str(e))
     print("YouTube has now terminated its execution. "
           "Thank you and goodbye!")
+
+
+def run_batch(command_file, buffer_output=False, playlist_store=None,
+              library=None, stats=None, search_answer=None):
+    """Runs every command of a script, without prompting.
+
+    Every line of the script is a command. When a search asks which result
+    to play, it is given search_answer rather than a line of the script,
+    so a script runs the same whatever its searches find. Blank lines are
+    skipped and an EXIT line ends the script early.
+
+    Args:
+        command_file: A file object with one command per line.
+        buffer_output: If True, the output of the whole script is written
+            to stdout in one go once the script ends.
+        playlist_store: An optional PlaylistStore to keep playlists in.
+        library: The VideoLibrary to play from. Defaults to a new library.
+        stats: An optional CommandStats to time commands in.
+        search_answer: The number of the result every search plays. None
+            plays nothing.
+    """
+    lines = (line.rstrip("\r\n") for line in command_file)
+    output = BufferedSink() if buffer_output else StdoutSink()
+    answer = "" if search_answer is None else str(search_answer)
+    video_player = VideoPlayer(input_reader=lambda: answer,
+                               output=output, playlist_store=playlist_store,
+                               library=library)
+    parser = CommandParser(video_player, stats=stats)
+    for command in lines:
+        if command.upper() == "EXIT":
+            break
+        if not command.strip():
+            continue
+        try:
+            parser.execute_command(command.split())
+        except CommandException as e:
+            output.write(str(e))
+    output.flush()
+
+
+def _search_answer(value):
+    """Parses --search-answer into a result number, or None for none."""
+    if value.lower() == "none":
+        return None
+    if not value.isdigit() or int(value) < 1:
+        raise argparse.ArgumentTypeError(
+            f"expected a result number or none, not {value!r}")
+    return int(value)
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument(
+        "--batch", metavar="FILE",
+        help="run the commands in FILE, or stdin if FILE is -, and exit")
+    arg_parser.add_argument(
+        "--buffer-output", action="store_true",
+        help="in batch mode, write all output at once when the script ends")
+    arg_parser.add_argument(
+        "--search-answer", metavar="N|none", type=_search_answer,
+        help="in batch mode, play result N of every search, or none of them "
+             "(the default)")
+    add_state_arguments(arg_parser, "playlists and video flags")
+    args = arg_parser.parse_args(argv)
+    state = AppState(args, keep_playlists=True)
+    try:
+        if args.batch is None:
+            run_interactive(state.playlist_store, state.library, state.stats)
+        elif args.batch == "-":
+            run_batch(sys.stdin, args.buffer_output, state.playlist_store,
+                      state.library, state.stats, args.search_answer)
+        else:
+            with open(args.batch) as command_file:
+                run_batch(command_file, args.buffer_output,
+                          state.playlist_store, state.library, state.stats,
+                          args.search_answer)
+    finally:
+        state.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""A bounded cache of search results."""
+
+from collections import OrderedDict
+import threading
+
+
+class SearchCache:
+    """A class used to represent a least recently used cache of searches.
+
+    Every entry records the library generation it was computed at, and is
+    only served while the library is still at that generation. Any change
+    to the library's videos or flags moves it to a new generation, so a
+    stale result is never returned.
+
+    Both the number of results and their total length are bounded, since
+    a search for a short or common term can match most of the library.
+    """
+
+    def __init__(self, max_entries=1024, stats=None, max_total_length=65536):
+        """The SearchCache class is initialized.
+
+        Args:
+            max_entries: The most results kept. The least recently used
+                result is dropped to make room. 0 disables the cache.
+            stats: An optional CommandStats the hits and misses are also
+                counted in, as "search_cache".
+            max_total_length: The most items kept across every result,
+                counted with len(). Least recently used results are dropped
+                to make room, and a longer result is not cached at all.
+        """
+        self._max_entries = max_entries
+        self._max_total_length = max_total_length
+        self._total_length = 0
+        self._stats = stats
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    @property
+    def hits(self):
+        """Returns the number of lookups answered from the cache."""
+        return self._hits
+
+    @property
+    def misses(self):
+        """Returns the number of lookups the cache could not answer."""
+        return self._misses
+
+    def get(self, key, generation):
+        """Returns the cached result for key, if still current.
+
+        Args:
+            key: The normalized search.
+            generation: The library's current generation.
+
+        Returns:
+            The result. None if it is not cached or was computed at an
+            older generation.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == generation:
+                self._entries.move_to_end(key)
+                self._hits += 1
+            else:
+                entry = None
+                self._misses += 1
+        if self._stats is not None:
+            if entry is None:
+                self._stats.miss("search_cache")
+            else:
+                self._stats.hit("search_cache")
+        return entry[1] if entry is not None else None
+
+    def put(self, key, generation, result):
+        """Caches a result.
+
+        Args:
+            key: The normalized search.
+            generation: The library generation read before the result was
+                computed.
+            result: The result to cache.
+        """
+        length = len(result)
+        if self._max_entries <= 0 or length > self._max_total_length:
+            return
+        with self._lock:
+            replaced = self._entries.pop(key, None)
+            if replaced is not None:
+                self._total_length -= len(replaced[1])
+            self._entries[key] = (generation, result)
+            self._total_length += length
+            while (len(self._entries) > self._max_entries
+                   or self._total_length > self._max_total_length):
+                _, (_, dropped) = self._entries.popitem(last=False)
+                self._total_length -= len(dropped)
+
+    def clear(self):
+        """Drops every cached result."""
+        with self._lock:
+            self._entries.clear()
+            self._total_length = 0
@@ -0,0 +1,144 @@
+"""A youtube simulator served over TCP.
+
+Clients send the same commands as typed in src.run, one per line, and get
+back the lines the command prints. Each connection has its own playback
+state and playlists, while every connection shares a single VideoLibrary.
+
+To start the server:
+    python3 -m src.server --port 8765
+"""
+import argparse
+import asyncio
+
+from .app_state import AppState
+from .app_state import add_state_arguments
+from .command_parser import CommandException
+from .command_parser import CommandParser
+from .output import BufferedSink
+from .video_library import VideoLibrary
+from .video_player import VideoPlayer
+
+GREETING = ("Hello and welcome to YouTube, what would you like to do?\n"
+            "    Enter HELP for list of available commands or EXIT to "
+            "terminate.")
+GOODBYE = "YouTube has now terminated its execution. Thank you and goodbye!"
+
+
+class _ConnectionStream:
+    """A file-like object writing to a connection from any thread."""
+
+    def __init__(self, writer, loop):
+        self._writer = writer
+        self._loop = loop
+
+    def write(self, text):
+        self._loop.call_soon_threadsafe(self._writer.write, text.encode())
+
+    def flush(self):
+        pass
+
+
+class _Session:
+    """The player and parser serving a single connection.
+
+    A search asking which result to play returns at once, and its answer
+    is read on the event loop, so a client slow to answer holds no thread.
+    """
+
+    def __init__(self, library, writer, stats):
+        self._output = BufferedSink(
+            _ConnectionStream(writer, asyncio.get_running_loop()))
+        self._player = VideoPlayer(output=self._output, library=library,
+                                   defer_answers=True)
+        self._parser = CommandParser(self._player, stats=stats)
+
+    @property
+    def awaiting_answer(self):
+        """Returns whether the last command asked which result to play."""
+        return self._player.awaiting_answer
+
+    def execute(self, command):
+        """Runs one command line and sends its output."""
+        try:
+            self._parser.execute_command(command.split())
+        except CommandException as e:
+            self._output.write(str(e))
+        self._output.flush()
+
+    def answer(self, answer):
+        """Answers the question asked by the last command."""
+        self._player.answer(answer)
+        self._output.flush()
+
+
+class VideoServer:
+    """A class used to serve video players to many TCP connections."""
+
+    def __init__(self, library=None, stats=None):
+        """The VideoServer class is initialized.
+
+        Args:
+            library: The VideoLibrary shared by every connection. Defaults
+                to a new library.
+            stats: An optional CommandStats the commands of every
+                connection are timed in.
+        """
+        self._library = library if library is not None else VideoLibrary()
+        self._stats = stats
+
+    async def handle_connection(self, reader, writer):
+        """Serves commands from one connection until EXIT or disconnect."""
+        session = _Session(self._library, writer, self._stats)
+        loop = asyncio.get_running_loop()
+        writer.write(f"{GREETING}\n".encode())
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                command = line.decode().rstrip("\r\n")
+                if command.upper() == "EXIT":
+                    writer.write(f"{GOODBYE}\n".encode())
+                    break
+                # Commands run in the shared pool, so a slow one does not
+                # hold up the other connections.
+                await loop.run_in_executor(None, session.execute, command)
+                if session.awaiting_answer:
+                    answer = await reader.readline()
+                    await loop.run_in_executor(
+                        None, session.answer, answer.decode().rstrip("\r\n"))
+                await writer.drain()
+            await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def start(self, host, port):
+        """Starts listening and returns the asyncio Server."""
+        return await asyncio.start_server(self.handle_connection, host, port)
+
+
+async def _serve(host, port, library, stats):
+    server = await VideoServer(library, stats).start(host, port)
+    async with server:
+        await server.serve_forever()
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument("--host", default="127.0.0.1")
+    arg_parser.add_argument("--port", type=int, default=8765)
+    add_state_arguments(arg_parser, "video flags")
+    args = arg_parser.parse_args(argv)
+    state = AppState(args)
+    try:
+        asyncio.run(_serve(args.host, args.port, state.library, state.stats))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        state.close()
+
+
+if __name__ == "__main__":
+    main()
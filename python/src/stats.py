@@ -0,0 +1,170 @@
+"""Command latency and hit rate statistics."""
+
+import json
+import threading
+
+# Latencies are counted in power of two buckets of nanoseconds. Bucket i
+# holds latencies whose bit length is i, that is from 2**(i-1) up to but
+# not including 2**i, so 64 buckets reach well past any real latency.
+_BUCKETS = 64
+
+
+def _format_ns(ns):
+    """Returns a latency in nanoseconds in the most readable unit."""
+    for unit, scale in (("s", 1e9), ("ms", 1e6), ("us", 1e3)):
+        if ns >= scale:
+            return f"{ns / scale:.1f} {unit}"
+    return f"{ns:.0f} ns"
+
+
+class LatencyHistogram:
+    """A class used to represent the latencies of one command.
+
+    Recording a latency only increments counters, so it allocates nothing.
+    Percentiles are reported as the upper bound of their bucket, which is
+    at most twice the true value.
+    """
+
+    __slots__ = ("count", "total_ns", "max_ns", "_buckets")
+
+    def __init__(self):
+        self.count = 0
+        self.total_ns = 0
+        self.max_ns = 0
+        self._buckets = [0] * _BUCKETS
+
+    def record(self, ns):
+        self.count += 1
+        self.total_ns += ns
+        if ns > self.max_ns:
+            self.max_ns = ns
+        self._buckets[min(ns.bit_length(), _BUCKETS - 1)] += 1
+
+    def percentile(self, fraction):
+        """Returns the bucket bound below which fraction of latencies fall.
+
+        Args:
+            fraction: The fraction of latencies, from 0 to 1.
+
+        Returns:
+            The bound in nanoseconds. 0 if nothing was recorded.
+        """
+        rank = fraction * self.count
+        seen = 0
+        for bucket, count in enumerate(self._buckets):
+            seen += count
+            if count and seen >= rank:
+                return min(1 << bucket, self.max_ns)
+        return 0
+
+    def buckets(self):
+        """Returns the count of every non-empty bucket, by upper bound."""
+        return {1 << bucket: count
+                for bucket, count in enumerate(self._buckets) if count}
+
+
+class CommandStats:
+    """A class used to collect command latencies and hit rates.
+
+    One CommandStats can be shared by several parsers and libraries,
+    including from different threads.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms = {}
+        self._hit_counts = {}
+
+    def record(self, command_name, ns):
+        """Records one run of a command.
+
+        Args:
+            command_name: The upper case name of the command.
+            ns: How long it took, in nanoseconds.
+        """
+        with self._lock:
+            histogram = self._histograms.get(command_name)
+            if histogram is None:
+                histogram = self._histograms[command_name] = LatencyHistogram()
+            histogram.record(ns)
+
+    def _count(self, name, index):
+        with self._lock:
+            counts = self._hit_counts.get(name)
+            if counts is None:
+                counts = self._hit_counts[name] = [0, 0]
+            counts[index] += 1
+
+    def hit(self, name):
+        """Counts a lookup answered by the named index or cache."""
+        self._count(name, 0)
+
+    def miss(self, name):
+        """Counts a lookup the named index or cache could not answer."""
+        self._count(name, 1)
+
+    def reset(self):
+        """Forgets everything recorded so far."""
+        with self._lock:
+            self._histograms.clear()
+            self._hit_counts.clear()
+
+    def to_dict(self):
+        """Returns the statistics as plain data, ready to serialize.
+
+        Returns:
+            A dict with a "commands" entry mapping each command name to its
+            count, total, mean, max and percentile latencies in nanoseconds
+            and its histogram buckets, and a "hit_rates" entry mapping each
+            index or cache to its hits, misses and hit rate.
+        """
+        with self._lock:
+            commands = {
+                name: {
+                    "count": histogram.count,
+                    "total_ns": histogram.total_ns,
+                    "mean_ns": histogram.total_ns // histogram.count,
+                    "max_ns": histogram.max_ns,
+                    "p50_ns": histogram.percentile(0.5),
+                    "p90_ns": histogram.percentile(0.9),
+                    "p99_ns": histogram.percentile(0.99),
+                    "buckets": histogram.buckets(),
+                }
+                for name, histogram in sorted(self._histograms.items())}
+            hit_rates = {
+                name: {"hits": hits, "misses": misses,
+                       "rate": hits / (hits + misses)}
+                for name, (hits, misses) in sorted(self._hit_counts.items())}
+        return {"commands": commands, "hit_rates": hit_rates}
+
+    def to_json(self):
+        """Returns the statistics of to_dict as a JSON string."""
+        return json.dumps(self.to_dict())
+
+    def export(self, path):
+        """Writes the statistics of to_dict to a JSON file."""
+        with open(path, "w", encoding="utf-8") as stats_file:
+            json.dump(self.to_dict(), stats_file, indent=2)
+
+    def format_lines(self):
+        """Returns the statistics as lines of readable text."""
+        stats = self.to_dict()
+        if not stats["commands"] and not stats["hit_rates"]:
+            return ["No statistics have been recorded yet."]
+        lines = []
+        if stats["commands"]:
+            lines.append("Command latencies:")
+            lines.extend(
+                f"    {name}: {entry['count']} calls, mean "
+                f"{_format_ns(entry['mean_ns'])}, p50 <= "
+                f"{_format_ns(entry['p50_ns'])}, p99 <= "
+                f"{_format_ns(entry['p99_ns'])}, max "
+                f"{_format_ns(entry['max_ns'])}"
+                for name, entry in stats["commands"].items())
+        if stats["hit_rates"]:
+            lines.append("Hit rates:")
+            lines.extend(
+                f"    {name}: {entry['hits']} hits, {entry['misses']} "
+                f"misses ({entry['rate']:.1%})"
+                for name, entry in stats["hit_rates"].items())
+        return lines
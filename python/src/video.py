@@ -1,21 +1,34 @@
 """A video class."""
 
-from typing import Sequence
+import sys
+from typing import Optional, Sequence
 
 
 class Video:
     """A class used to represent a Video."""
 
+    # Libraries hold millions of videos, so skip the per-instance __dict__.
+    __slots__ = ("_title", "_video_id", "_tags", "_flag_reason", "_tags_text",
+                 "_row")
+
     def __init__(self, video_title: str, video_id: str, video_tags: Sequence[str]):
         """Video constructor."""
         self._title = video_title
         self._video_id = video_id
 
         # Turn the tags into a tuple here so it's unmodifiable,
-        # in case the caller changes the 'video_tags' they passed to us
-        self._tags = tuple(video_tags)
-        self._flag = False
-        self._flag_reason = "Not supplied"
+        # in case the caller changes the 'video_tags' they passed to us.
+        # Tags repeat across many videos, so every video shares one
+        # interned copy of each tag string.
+        self._tags = tuple(sys.intern(tag) for tag in video_tags)
+        # The whole flag state lives in this one attribute, None when the
+        # video is not flagged, so a reader on another thread can never see
+        # a flag without its reason or the other way round.
+        self._flag_reason = None
+        # Display strings, built the first time they are shown. _row pairs
+        # the listing line with the flag reason it was built for.
+        self._tags_text = None
+        self._row = None
 
     @property
     def title(self) -> str:
@@ -33,22 +46,51 @@ class Video:
         return self._tags
 
     @property
-    def flag(self) -> str:
-        """Returns the reason for flag."""
-        return self._flag
+    def flag(self) -> bool:
+        """Returns whether the video is flagged."""
+        return self._flag_reason is not None
 
     @property
     def flag_reason(self) -> str:
         """Returns the reason for flag."""
+        reason = self._flag_reason
+        return "Not supplied" if reason is None else reason
+
+    @property
+    def flagged_reason(self) -> Optional[str]:
+        """Returns the reason for flag, or None if the video is not flagged.
+
+        Reads the flag and its reason together, which reading flag and then
+        flag_reason does not while another thread may change them.
+        """
         return self._flag_reason
 
     def set_flag(self, reason="Not supplied"):
         self._flag_reason = reason
-        self._flag = True
+        self._row = None
 
     def allow(self):
-        self._flag_reason = "Not supplied"
-        self._flag = False
+        self._flag_reason = None
+        self._row = None
 
     def format_tags(self):
-        return ' '.join([str(elem) for elem in self.tags]).replace("(", "").replace(")", "").replace("'", "")
\ No newline at end of file
+        text = self._tags_text
+        if text is None:
+            text = self._tags_text = ' '.join([str(elem) for elem in self.tags]).replace("(", "").replace(")", "").replace("'", "")
+        return text
+
+    def format_row(self) -> str:
+        """Returns the line listing the video, noting any flag.
+
+        The line is built once and reused until the flag changes.
+        """
+        reason = self._flag_reason
+        row = self._row
+        # A line built on another thread just before a flag change carries
+        # the old reason, so it is rebuilt rather than shown.
+        if row is None or row[0] is not reason:
+            line = f"    {self._title} ({self._video_id}) [{self.format_tags()}]"
+            if reason is not None:
+                line = f"{line} - FLAGGED (reason: {reason})"
+            row = self._row = (reason, line)
+        return row[1]
\ No newline at end of file
@@ -1,37 +1,551 @@
 """A video library class."""
 
+from .catalog import MappedCatalog
+from .catalog import read_catalog
+from .catalog import read_catalog_parallel
+from .catalog_snapshot import load_snapshot
+from .fuzzy import BKTree
+from .prefix_index import PrefixIndex
+from .search_cache import SearchCache
 from .video import Video
+from bisect import bisect_left
+from bisect import bisect_right
+from collections import Counter
+from heapq import nsmallest
+from itertools import islice
+from math import log
 from pathlib import Path
-import csv
+from random import randrange
+import re
+import threading
 
+# BM25 parameters for ranked search: term frequency saturation, and how
+# much a long title and tag list dampens its score.
+_BM25_K1 = 1.2
+_BM25_B = 0.75
 
-# Helper Wrapper around CSV reader to strip whitespace from around
-# each item.
-def _csv_reader_with_strip(reader):
-    yield from ((item.strip() for item in line) for line in reader)
+_TERM_PATTERN = re.compile(r"[^\W_]+")
+
+# Number of locks guarding flag changes. Videos are spread over them by id,
+# so flagging different videos rarely contends.
+_FLAG_LOCK_STRIPES = 64
+
+# Length of the substrings used by the title index. Search terms shorter
+# than this cannot be answered from the index and fall back to a scan.
+_GRAM_SIZE = 3
+
+
+def _fuzzy_distance(term):
+    """Returns the edit distance a query word may be off by in fuzzy search.
+
+    Short words get little slack, so they do not match most of the titles.
+    """
+    if len(term) < 3:
+        return 0
+    return 1 if len(term) < 6 else 2
+
+
+def _grams(text):
+    """Returns the set of _GRAM_SIZE long substrings of text."""
+    return {text[i:i + _GRAM_SIZE] for i in range(len(text) - _GRAM_SIZE + 1)}
+
+
+def _terms(text):
+    """Returns the lower case words of text, the unit of ranked search."""
+    return _TERM_PATTERN.findall(text.lower())
+
+
+def _video_terms(video):
+    """Returns the words of a video's title and tags."""
+    terms = _terms(video.title)
+    for tag in video.tags:
+        terms.extend(_terms(tag))
+    return terms
+
+
+def _title_key(video):
+    """Returns the key videos are listed by: title, then id for ties."""
+    return video.title, video.video_id
+
+
+class _TitleOrderedVideos:
+    """A list of videos kept sorted by title.
+
+    The sort keys are held in a parallel list so that insertions and
+    removals can find their position with a binary search.
+    """
+
+    def __init__(self, videos=()):
+        self._videos = sorted(videos, key=_title_key)
+        self._keys = [_title_key(video) for video in self._videos]
+
+    @classmethod
+    def from_sorted(cls, videos):
+        """Returns a read-only list of videos already ordered by title.
+
+        Nothing is sorted, and the keys are only built once a lookup by key
+        needs them. The list must not be added to or removed from.
+        """
+        ordered = cls()
+        ordered._videos = list(videos)
+        ordered._keys = None
+        return ordered
+
+    def __len__(self):
+        return len(self._videos)
+
+    def __iter__(self):
+        return iter(self._videos)
+
+    def _sorted_keys(self):
+        keys = self._keys
+        if keys is None:
+            # Racing threads build equal lists, so either may be kept.
+            keys = self._keys = [_title_key(video) for video in self._videos]
+        return keys
+
+    def iter_from(self, start=0, after=None):
+        """Returns an iterator starting part way through the list.
+
+        Args:
+            start: The position to start at.
+            after: If given, a (title, video_id) key. Iteration starts at
+                the first video listed after it, plus start, whether or not
+                that video is still in the list.
+        """
+        if after is not None:
+            start += bisect_right(self._sorted_keys(), tuple(after))
+        videos = self._videos
+        return (videos[i] for i in range(start, len(videos)))
+
+    def add(self, video):
+        key = _title_key(video)
+        index = bisect_left(self._keys, key)
+        self._keys.insert(index, key)
+        self._videos.insert(index, video)
+
+    def remove(self, video):
+        key = _title_key(video)
+        index = bisect_left(self._keys, key)
+        if index < len(self._keys) and self._keys[index] == key:
+            del self._keys[index]
+            del self._videos[index]
+
+
+class _UnflaggedVideos:
+    """The unflagged videos of a title-ordered list, read as they are needed.
+
+    Nothing is copied, so a page costs its own size plus any flagged videos
+    skipped, however long the list is.
+    """
+
+    def __init__(self, videos):
+        self._videos = videos
+
+    def __bool__(self):
+        return any(not video.flag for video in self._videos)
+
+    def iter_from(self, start=0, after=None):
+        """Returns an iterator starting part way through the videos.
+
+        Args:
+            start: The number of unflagged videos to skip.
+            after: If given, a (title, video_id) key. Iteration starts at
+                the first video listed after it, plus start.
+        """
+        videos = self._videos.iter_from(0, after)
+        return islice((video for video in videos if not video.flag),
+                      start, None)
 
 
 class VideoLibrary:
-    """A class used to represent a Video Library."""
+    """A class used to represent a Video Library.
+
+    A library can be shared by threads. Lookups, listings, searches and
+    random picks take no locks. Flag changes are serialized per video by a
+    striped lock, and the few shared structures they touch by short
+    internal locks, so readers never wait for writers.
+    """
+
+    def __init__(self, path=None, lazy=False, snapshot_path=None,
+                 workers=1, flag_journal=None, stats=None,
+                 search_cache_size=1024, search_cache_length=65536):
+        """The VideoLibrary class is initialized.
 
-    def __init__(self):
-        """The VideoLibrary class is initialized."""
+        Args:
+            path: The catalog file to load. Defaults to the bundled
+                videos.txt.
+            lazy: If True, the catalog is memory-mapped and only indexed by
+                video id up front. A Video is built the first time
+                get_video asks for it, and the whole catalog is only loaded
+                once a listing, search or random pick needs it.
+            snapshot_path: If given, the catalog is loaded from this binary
+                snapshot instead of being parsed. The snapshot is compiled
+                from path first if it is missing or out of date.
+            workers: The number of processes parsing the catalog text.
+                None uses one per CPU. Lines that cannot be parsed are
+                skipped with a CatalogWarning giving their line number.
+            flag_journal: A ModerationJournal the flags are restored from
+                and every flag change is saved to.
+            stats: A CommandStats the hit rates of the library's indexes
+                and search cache are counted in.
+            search_cache_size: The most search results kept for reuse.
+                0 turns the search cache off.
+            search_cache_length: The most videos held across every cached
+                search result. A larger limit keeps the searches for
+                common terms cached too, at the cost of a reference per
+                matching video. Tags matching more videos than this are
+                paged straight from the tag index instead, and title
+                searches matching more are searched again every time.
+        """
         self._videos = {}
-        with open(Path(__file__).parent / "videos.txt") as video_file:
-            reader = _csv_reader_with_strip(
-                csv.reader(video_file, delimiter="|"))
-            for video_info in reader:
-                title, url, tags = video_info
-                self._videos[url] = Video(
-                    title,
-                    url,
-                    [tag.strip() for tag in tags.split(",")] if tags else [],
-                )
+        # The catalog still to be loaded, while a lazy library has not
+        # built its indexes yet.
+        self._pending = None
+        self._playable_ids = []
+        self._playable_positions = {}
+        self._flag_locks = [threading.Lock() for _ in range(_FLAG_LOCK_STRIPES)]
+        self._playable_lock = threading.Lock()
+        # The fuzzy search index, built by its first search. _title_words
+        # maps each lower case title word to the ids of the videos using it,
+        # and _fuzzy_tree holds those words.
+        self._title_words = None
+        self._fuzzy_tree = None
+        # The prefix indexes of video ids and titles, built by the first
+        # completion.
+        self._id_completions = None
+        self._title_completions = None
+        # The trigram title index, built by the first title search.
+        # _normalized_titles maps each video id to its upper case title, and
+        # _title_index maps each trigram of those titles to the ids of the
+        # videos whose title contains it.
+        self._normalized_titles = None
+        self._title_index = None
+        # The ranked search index, built by the first ranked search.
+        # _term_index maps each word of the titles and tags to the ids of
+        # the videos using it and how often, with _term_counts and
+        # _total_terms holding the document lengths BM25 needs.
+        self._term_index = None
+        self._term_counts = None
+        self._total_terms = 0
+        # Guards adding and removing videos, and loading a lazy catalog.
+        self._index_lock = threading.RLock()
+        if path is None:
+            path = Path(__file__).parent / "videos.txt"
+        if snapshot_path is not None:
+            catalog = load_snapshot(snapshot_path, path)
+        elif lazy:
+            catalog = MappedCatalog(path)
+        elif workers == 1:
+            catalog = read_catalog(path)
+        else:
+            catalog = read_catalog_parallel(path, workers)
+        self._flag_journal = flag_journal
+        self._stats = stats
+        # Moves on every change to the videos or their flags, so cached
+        # search results know when they went stale.
+        self._generation = 0
+        self._generation_lock = threading.Lock()
+        self._search_cache_length = search_cache_length
+        self._search_cache = SearchCache(
+            search_cache_size, stats, search_cache_length)
+        if lazy:
+            self._pending = catalog
+        else:
+            for entry in catalog:
+                video = Video(*entry)
+                self._videos[video.video_id] = video
+            self._build_indexes()
+        if flag_journal is not None:
+            for video_id, flag_reason in flag_journal.flags():
+                # Flags of videos no longer in the catalog are ignored.
+                video = self.get_video(video_id)
+                if video is not None:
+                    video.set_flag(flag_reason)
+                    self._remove_playable(video_id)
+
+    def _ensure_indexed(self):
+        """Loads the rest of a lazy catalog and builds the indexes.
+
+        Does nothing once the library is fully loaded.
+        """
+        if self._pending is None:
+            return
+        with self._index_lock:
+            if self._pending is None:
+                return
+            # Rebuild in catalog order, keeping videos that were already
+            # materialized (and possibly flagged) rather than replacing them.
+            loaded = self._videos
+            videos = {}
+            for entry in self._pending:
+                video = loaded.get(entry[1])
+                videos[entry[1]] = video if video is not None else Video(*entry)
+            self._videos = videos
+            self._build_indexes()
+            self._pending.close()
+            self._pending = None
+
+    def _build_indexes(self):
+        """Builds every index over the videos currently in the library.
+
+        _sorted_videos holds the library in title order. _tag_index maps a
+        lower case tag to the videos carrying it, also in title order.
+        _playable_ids holds the ids of the unflagged videos, with
+        _playable_positions mapping each id to its slot so it can be
+        swap-removed in constant time. The title, term, fuzzy and completion
+        indexes are left to the first search needing them.
+        """
+        self._playable_ids = []
+        self._playable_positions = {}
+        self._sorted_videos = _TitleOrderedVideos(self._videos.values())
+        self._tag_index = {}
+        tag_postings = {}
+        for video in self._videos.values():
+            for tag in self._tag_keys(video):
+                tag_postings.setdefault(tag, []).append(video)
+            if not video.flag:
+                self._add_playable(video.video_id)
+        for tag, videos in tag_postings.items():
+            self._tag_index[tag] = _TitleOrderedVideos(videos)
+
+    @staticmethod
+    def _tag_keys(video):
+        # A video listing the same tag twice should only appear once.
+        return {tag.lower() for tag in video.tags}
+
+    def _index_title(self, video, title_index):
+        """Adds a video's title to _normalized_titles and title_index."""
+        normalized = video.title.upper()
+        self._normalized_titles[video.video_id] = normalized
+        for gram in _grams(normalized):
+            title_index.setdefault(gram, set()).add(video.video_id)
+
+    def _index_terms(self, video, term_index):
+        """Adds a video's words to term_index and the document lengths."""
+        terms = _video_terms(video)
+        self._term_counts[video.video_id] = len(terms)
+        self._total_terms += len(terms)
+        for term, count in Counter(terms).items():
+            term_index.setdefault(term, {})[video.video_id] = count
+
+    def _unindex_terms(self, video):
+        self._total_terms -= self._term_counts.pop(video.video_id)
+        for term in set(_video_terms(video)):
+            postings = self._term_index[term]
+            del postings[video.video_id]
+            if not postings:
+                del self._term_index[term]
+
+    def _index_title_words(self, video):
+        for word in set(_terms(video.title)):
+            video_ids = self._title_words.get(word)
+            if video_ids is None:
+                video_ids = self._title_words[word] = set()
+                self._fuzzy_tree.add(word)
+            video_ids.add(video.video_id)
+
+    def _ensure_title_index(self):
+        """Builds the trigram title index. Does nothing once it is built."""
+        self._ensure_indexed()
+        if self._title_index is not None:
+            return
+        with self._index_lock:
+            if self._title_index is not None:
+                return
+            self._normalized_titles = {}
+            # Filled through a local name, so searches keep waiting for
+            # the lock until the whole index is in place.
+            title_index = {}
+            for video in self._videos.values():
+                self._index_title(video, title_index)
+            self._title_index = title_index
+
+    def _ensure_term_index(self):
+        """Builds the ranked search index. Does nothing once it is built."""
+        self._ensure_indexed()
+        if self._term_index is not None:
+            return
+        with self._index_lock:
+            if self._term_index is not None:
+                return
+            self._term_counts = {}
+            self._total_terms = 0
+            # Filled through a local name, so searches keep waiting for
+            # the lock until the whole index is in place.
+            term_index = {}
+            for video in self._videos.values():
+                self._index_terms(video, term_index)
+            self._term_index = term_index
+
+    def _ensure_fuzzy_index(self):
+        """Builds the fuzzy search index. Does nothing once it is built."""
+        self._ensure_indexed()
+        if self._fuzzy_tree is not None:
+            return
+        with self._index_lock:
+            if self._fuzzy_tree is not None:
+                return
+            self._title_words = {}
+            self._fuzzy_tree = BKTree()
+            for video in self._videos.values():
+                self._index_title_words(video)
+
+    def _ensure_completion_indexes(self):
+        """Builds the completion indexes. Does nothing once they are built."""
+        self._ensure_indexed()
+        if self._id_completions is not None:
+            return
+        with self._index_lock:
+            if self._id_completions is None:
+                self._title_completions = PrefixIndex(
+                    video.title for video in self._videos.values())
+                self._id_completions = PrefixIndex(self._videos)
+
+    def _add_playable(self, video_id):
+        with self._playable_lock:
+            self._add_playable_locked(video_id)
+
+    def _add_playable_locked(self, video_id):
+        """Adds a playable id. Needs _playable_lock held."""
+        if video_id not in self._playable_positions:
+            self._playable_positions[video_id] = len(self._playable_ids)
+            self._playable_ids.append(video_id)
+
+    def _remove_playable(self, video_id):
+        with self._playable_lock:
+            self._remove_playable_locked(video_id)
+
+    def _remove_playable_locked(self, video_id):
+        """Removes a playable id. Needs _playable_lock held."""
+        position = self._playable_positions.pop(video_id, None)
+        if position is None:
+            return
+        # Move the last id into the freed slot so the list stays dense.
+        last_id = self._playable_ids.pop()
+        if last_id != video_id:
+            self._playable_ids[position] = last_id
+            self._playable_positions[last_id] = position
+
+    def _next_generation(self):
+        """Moves to a new generation. Called once a change is made."""
+        with self._generation_lock:
+            self._generation += 1
+
+    @property
+    def generation(self):
+        """Returns a number that changes whenever videos or flags change."""
+        return self._generation
+
+    @property
+    def search_cache(self):
+        """Returns the SearchCache, for its hit and miss counts."""
+        return self._search_cache
+
+    def _flag_lock(self, video_id):
+        return self._flag_locks[hash(video_id) % _FLAG_LOCK_STRIPES]
+
+    def add_video(self, video):
+        """Adds a video to the library and all of its indexes.
+
+        Args:
+            video: The Video object to add. A video with the same id is
+                replaced.
+        """
+        self._ensure_indexed()
+        with self._index_lock:
+            if video.video_id in self._videos:
+                self.remove_video(video.video_id)
+            self._videos[video.video_id] = video
+            self._sorted_videos.add(video)
+            for tag in self._tag_keys(video):
+                self._tag_index.setdefault(tag, _TitleOrderedVideos()).add(video)
+            if self._title_index is not None:
+                self._index_title(video, self._title_index)
+            if self._term_index is not None:
+                self._index_terms(video, self._term_index)
+            if not video.flag:
+                self._add_playable(video.video_id)
+            if self._fuzzy_tree is not None:
+                self._index_title_words(video)
+            if self._id_completions is not None:
+                self._id_completions.add(video.video_id)
+                self._title_completions.add(video.title)
+            self._next_generation()
+
+    def remove_video(self, video_id):
+        """Removes a video from the library and all of its indexes.
+
+        Args:
+            video_id: The id of the video to remove.
+
+        Returns:
+            The removed Video object. None if the video does not exist.
+        """
+        self._ensure_indexed()
+        with self._index_lock:
+            video = self._videos.pop(video_id, None)
+            if video is None:
+                return None
+            self._sorted_videos.remove(video)
+            self._remove_playable(video_id)
+            for tag in self._tag_keys(video):
+                postings = self._tag_index[tag]
+                postings.remove(video)
+                if not postings:
+                    del self._tag_index[tag]
+            if self._title_index is not None:
+                for gram in _grams(self._normalized_titles.pop(video_id)):
+                    postings = self._title_index[gram]
+                    postings.discard(video_id)
+                    if not postings:
+                        del self._title_index[gram]
+            if self._term_index is not None:
+                self._unindex_terms(video)
+            if self._fuzzy_tree is not None:
+                # Words stay in the tree, which cannot remove them, and are
+                # skipped by searches once no title uses them.
+                for word in set(_terms(video.title)):
+                    video_ids = self._title_words[word]
+                    video_ids.discard(video_id)
+                    if not video_ids:
+                        del self._title_words[word]
+            if self._id_completions is not None:
+                self._id_completions.remove(video_id)
+                self._title_completions.remove(video.title)
+            self._next_generation()
+            return video
+
+    def __len__(self):
+        if self._pending is not None:
+            return len(self._pending)
+        return len(self._videos)
 
     def get_all_videos(self):
         """Returns all available video information from the video library."""
+        self._ensure_indexed()
         return list(self._videos.values())
 
+    def iter_videos(self, start=0, after=None):
+        """Returns an iterator over all videos, ordered by title.
+
+        The order is maintained as videos are added and removed, so no
+        sorting or copying happens here, and starting part way through
+        costs no more than starting at the beginning.
+
+        Args:
+            start: The number of videos to skip.
+            after: If given, the (title, video_id) of a video. Iteration
+                starts with the video listed after it.
+        """
+        self._ensure_indexed()
+        return self._sorted_videos.iter_from(start, after)
+
+    @staticmethod
+    def listing_key(video):
+        """Returns the (title, video_id) key that listings are ordered by."""
+        return _title_key(video)
+
     def get_video(self, video_id):
         """Returns the video object (title, url, tags) from the video library.
 
@@ -42,4 +556,382 @@ class VideoLibrary:
             The Video object for the requested video_id. None if the video
             does not exist.
         """
-        return self._videos.get(video_id, None)
+        video = self._videos.get(video_id, None)
+        if self._pending is not None and self._stats is not None:
+            # Counts how often a lazy library has already built the video.
+            if video is None:
+                self._stats.miss("lazy_videos")
+            else:
+                self._stats.hit("lazy_videos")
+        if video is None and self._pending is not None:
+            with self._index_lock:
+                video = self._videos.get(video_id, None)
+                if video is None and self._pending is not None:
+                    entry = self._pending.get(video_id)
+                    if entry is not None:
+                        video = self._videos[video_id] = Video(*entry)
+        return video
+
+    def flag_video(self, video_id, flag_reason="Not supplied"):
+        """Flags a video so it is no longer playable.
+
+        Args:
+            video_id: The id of the video to flag.
+            flag_reason: Reason for flagging the video.
+
+        Returns:
+            True if the video was flagged. False if it does not exist or was
+            already flagged.
+        """
+        video = self.get_video(video_id)
+        if video is None:
+            return False
+        with self._flag_lock(video_id):
+            if video.flag:
+                return False
+            video.set_flag(flag_reason)
+            self._remove_playable(video_id)
+            if self._flag_journal is not None:
+                self._flag_journal.flagged(video_id, flag_reason)
+            self._next_generation()
+        return True
+
+    def allow_video(self, video_id):
+        """Removes the flag from a video so it is playable again.
+
+        Args:
+            video_id: The id of the video to allow.
+
+        Returns:
+            True if the flag was removed. False if the video does not exist
+            or was not flagged.
+        """
+        video = self.get_video(video_id)
+        if video is None:
+            return False
+        with self._flag_lock(video_id):
+            if not video.flag:
+                return False
+            video.allow()
+            self._add_playable(video_id)
+            if self._flag_journal is not None:
+                self._flag_journal.allowed(video_id)
+            self._next_generation()
+        return True
+
+    def flag_videos(self, video_ids, flag_reason="Not supplied"):
+        """Flags several videos so they are no longer playable.
+
+        Each video is flagged as flag_video would, and the playable set
+        and generation are then updated once for all of them.
+
+        Args:
+            video_ids: The ids of the videos to flag.
+            flag_reason: Reason for flagging the videos.
+
+        Returns:
+            A list holding, for each id in order, True if the video was
+            flagged and False if it does not exist or was already flagged.
+        """
+        results = []
+        flagged = []
+        for video_id in video_ids:
+            video = self.get_video(video_id)
+            result = False
+            if video is not None:
+                with self._flag_lock(video_id):
+                    if not video.flag:
+                        video.set_flag(flag_reason)
+                        if self._flag_journal is not None:
+                            self._flag_journal.flagged(video_id, flag_reason)
+                        result = True
+            if result:
+                flagged.append(video)
+            results.append(result)
+        if flagged:
+            with self._playable_lock:
+                for video in flagged:
+                    # An allow_video since the flag was set has already
+                    # made the video playable again.
+                    if video.flag:
+                        self._remove_playable_locked(video.video_id)
+            self._next_generation()
+        return results
+
+    def allow_videos(self, video_ids):
+        """Removes the flags from several videos so they are playable again.
+
+        Each video is allowed as allow_video would, and the playable set
+        and generation are then updated once for all of them.
+
+        Args:
+            video_ids: The ids of the videos to allow.
+
+        Returns:
+            A list holding, for each id in order, True if the flag was
+            removed and False if the video does not exist or was not
+            flagged.
+        """
+        results = []
+        allowed = []
+        for video_id in video_ids:
+            video = self.get_video(video_id)
+            result = False
+            if video is not None:
+                with self._flag_lock(video_id):
+                    if video.flag:
+                        video.allow()
+                        if self._flag_journal is not None:
+                            self._flag_journal.allowed(video_id)
+                        result = True
+            if result:
+                allowed.append(video)
+            results.append(result)
+        if allowed:
+            with self._playable_lock:
+                for video in allowed:
+                    # A flag_video since the flag was removed keeps the
+                    # video out of the playable set.
+                    if not video.flag:
+                        self._add_playable_locked(video.video_id)
+            self._next_generation()
+        return results
+
+    def get_random_playable_video(self):
+        """Returns a uniformly chosen unflagged video.
+
+        Returns:
+            A Video object that is not flagged. None if every video is
+            flagged or the library is empty.
+        """
+        self._ensure_indexed()
+        playable_ids = self._playable_ids
+        while playable_ids:
+            # The list may shrink or a video be flagged between these
+            # reads, so a pick that went stale is simply retried.
+            try:
+                video = self._videos.get(
+                    playable_ids[randrange(len(playable_ids))])
+            except (IndexError, ValueError):
+                continue
+            if video is not None and not video.flag:
+                return video
+        return None
+
+    def get_videos_with_tag(self, video_tag, start=0, after=None):
+        """Returns the videos carrying the given tag, ordered by title.
+
+        Args:
+            video_tag: The tag to look up, matched case-insensitively.
+            start: The number of matching videos to skip.
+            after: If given, the (title, video_id) of a video. Iteration
+                starts with the matching video listed after it.
+
+        Returns:
+            An iterator over the matching Video objects. Empty if no video
+            has the tag.
+        """
+        self._ensure_indexed()
+        postings = self._tag_index.get(video_tag.lower())
+        if postings is None:
+            return iter(())
+        return postings.iter_from(start, after)
+
+    def search_titles(self, search_term):
+        """Returns the videos whose title contains the search term.
+
+        Terms of at least _GRAM_SIZE characters are answered by intersecting
+        the posting sets of their trigrams. Shorter terms are matched by
+        scanning every title. The trigram index is built by the first
+        title search.
+
+        Args:
+            search_term: The substring to look for, matched case-insensitively.
+
+        Returns:
+            A list of matching Video objects, ordered by title.
+        """
+        self._ensure_title_index()
+        term = search_term.upper()
+        if len(term) < _GRAM_SIZE:
+            if self._stats is not None:
+                self._stats.miss("title_index")
+            # The scan walks the title order, so no sort is needed.
+            return [video for video in self._sorted_videos
+                    if term in self._normalized_titles[video.video_id]]
+        if self._stats is not None:
+            self._stats.hit("title_index")
+        postings = sorted((self._title_index.get(gram, set())
+                           for gram in _grams(term)), key=len)
+        candidates = postings[0].intersection(*postings[1:])
+        # Sharing every trigram does not guarantee the term occurs in one
+        # piece, so each candidate is still checked against its title.
+        results = [self._videos[video_id] for video_id in candidates
+                   if term in self._normalized_titles[video_id]]
+        results.sort(key=_title_key)
+        return results
+
+    def search_ranked(self, query, k=10):
+        """Returns the unflagged videos best matching the words of a query.
+
+        Titles and tags are scored with BM25 against the words of the
+        query, using the term statistics kept by the library. Only the best
+        k scores are kept while scoring, rather than sorting every match.
+        The term statistics are gathered by the first ranked search.
+
+        Args:
+            query: The search text. Its words are matched case-insensitively.
+            k: The most videos to return.
+
+        Returns:
+            A list of at most k Video objects, best match first and ties
+            in title order.
+        """
+        self._ensure_term_index()
+        document_count = len(self._term_counts)
+        if not document_count or k <= 0:
+            return []
+        average_length = self._total_terms / document_count or 1
+        scores = {}
+        for term in set(_terms(query)):
+            postings = self._term_index.get(term, {})
+            idf = log(1 + (document_count - len(postings) + 0.5)
+                      / (len(postings) + 0.5))
+            for video_id, count in postings.items():
+                length_norm = 1 - _BM25_B + _BM25_B * (
+                    self._term_counts[video_id] / average_length)
+                scores[video_id] = scores.get(video_id, 0) + idf * (
+                    count * (_BM25_K1 + 1) / (count + _BM25_K1 * length_norm))
+        matches = ((score, self._videos[video_id])
+                   for video_id, score in scores.items())
+        best = nsmallest(
+            k, ((-score, _title_key(video), video)
+                for score, video in matches if not video.flag),
+            key=lambda x: x[:2])
+        return [video for _, _, video in best]
+
+    def search_fuzzy(self, query, max_distance=None):
+        """Returns the videos whose titles nearly contain every query word.
+
+        Each query word is looked up in a BK-tree of the title words, so
+        only a small part of the vocabulary is compared against it. The
+        tree is built by the first fuzzy search.
+
+        Args:
+            query: The words to look for, matched case-insensitively.
+            max_distance: The edit distance each word may be off by.
+                Defaults to 0 for words under 3 letters, 1 for words under
+                6 letters and 2 for longer words.
+
+        Returns:
+            A list of matching Video objects, fewest edits first, then
+            ordered by title.
+        """
+        self._ensure_fuzzy_index()
+        totals = None
+        for term in set(_terms(query)):
+            allowed = (_fuzzy_distance(term) if max_distance is None
+                       else max_distance)
+            # The distance of each video's closest title word to the term.
+            closest = {}
+            for word, distance in self._fuzzy_tree.search(term, allowed).items():
+                for video_id in tuple(self._title_words.get(word, ())):
+                    if distance < closest.get(video_id, allowed + 1):
+                        closest[video_id] = distance
+            if totals is None:
+                totals = closest
+            else:
+                totals = {video_id: totals[video_id] + distance
+                          for video_id, distance in closest.items()
+                          if video_id in totals}
+            if not totals:
+                return []
+        if totals is None:
+            return []
+        matches = []
+        for video_id, total in totals.items():
+            video = self._videos.get(video_id)
+            if video is not None:
+                matches.append((total, _title_key(video), video))
+        matches.sort(key=lambda match: match[:2])
+        return [video for _, _, video in matches]
+
+    def complete_video_ids(self, prefix, limit=None):
+        """Returns the video ids starting with prefix, ignoring case.
+
+        Args:
+            prefix: The start of the ids to find.
+            limit: The most ids to return. None returns every match.
+
+        Returns:
+            A list of video ids, in alphabetical order.
+        """
+        self._ensure_completion_indexes()
+        return self._id_completions.complete(prefix, limit)
+
+    def complete_titles(self, prefix, limit=None):
+        """Returns the video titles starting with prefix, ignoring case.
+
+        Args:
+            prefix: The start of the titles to find.
+            limit: The most titles to return. None returns every match.
+
+        Returns:
+            A list of distinct titles, in alphabetical order.
+        """
+        self._ensure_completion_indexes()
+        return self._title_completions.complete(prefix, limit)
+
+    def _cached_search(self, key, search):
+        """Returns the title-ordered result of a search, reusing it if cached.
+
+        Args:
+            key: The normalized search the result is cached under.
+            search: A callable returning the matching videos, already
+                ordered by title.
+        """
+        # Read before searching, so a change made during the search leaves
+        # the result stored under the generation it is already stale for.
+        generation = self._generation
+        results = self._search_cache.get(key, generation)
+        if results is None:
+            results = _TitleOrderedVideos.from_sorted(search())
+            self._search_cache.put(key, generation, results)
+        return results
+
+    def search_playable_titles(self, search_term):
+        """Returns the unflagged videos whose title contains the search term.
+
+        Args:
+            search_term: The substring to look for, matched case-insensitively.
+
+        Returns:
+            The matching videos ordered by title, as an object with len()
+            and iter_from(start, after) like iter_videos.
+        """
+        return self._cached_search(
+            ("title", search_term.upper()),
+            lambda: (video for video in self.search_titles(search_term)
+                     if not video.flag))
+
+    def playable_videos_with_tag(self, video_tag):
+        """Returns the unflagged videos carrying the given tag.
+
+        Args:
+            video_tag: The tag to look up, matched case-insensitively.
+
+        Returns:
+            The matching videos ordered by title, as an object that is
+            false when empty and has iter_from(start, after) like
+            iter_videos.
+        """
+        self._ensure_indexed()
+        postings = self._tag_index.get(video_tag.lower())
+        if postings is not None and len(postings) > self._search_cache_length:
+            # Too long to cache, so pages are read from the tag's posting
+            # list rather than copying it on every search.
+            return _UnflaggedVideos(postings)
+        return self._cached_search(
+            ("tag", video_tag.lower()),
+            lambda: (video for video in self.get_videos_with_tag(video_tag)
+                     if not video.flag))
@@ -1,9 +1,58 @@
 """A video player class."""
 
+from .output import StdoutSink
+from .prefix_index import PrefixIndex
 from .video_library import VideoLibrary
 from .video_playlist import Playlist
-from random import choice
 from enum import Enum
+from heapq import merge
+from itertools import islice
+import base64
+import json
+
+# Number of videos on a page when a listing is paged without a limit.
+DEFAULT_PAGE_SIZE = 20
+
+# Most names listed by the COMPLETE command.
+COMPLETION_LIMIT = 20
+
+
+def _encode_cursor(position):
+    """Returns an opaque cursor for a position in a listing.
+
+    The position is either the (title, video_id) key of the last video
+    shown, for listings in title order, or the number of videos shown so
+    far, for playlists.
+    """
+    data = json.dumps(position, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(data).decode().rstrip("=")
+
+
+def _decode_cursor(cursor, keyed):
+    """Returns the position encoded in a cursor.
+
+    Raises:
+        ValueError: The cursor was not made by _encode_cursor for this kind
+            of listing.
+    """
+    data = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+    position = json.loads(data)
+    if keyed and isinstance(position, list) and len(position) == 2 \
+            and all(isinstance(item, str) for item in position):
+        return tuple(position)
+    if not keyed and type(position) is int and position >= 0:
+        return position
+    raise ValueError(f"Invalid cursor: {cursor}")
+
+
+def _valid_paging_number(number):
+    """Returns whether a limit or page number is unset or at least 1."""
+    return number is None or number >= 1
+
+
+def _count_videos(count):
+    """Returns a number of videos in words, such as "1 video"."""
+    return f"{count} video" if count == 1 else f"{count} videos"
 
 
 class Errors(Enum):
@@ -20,61 +69,213 @@ class Errors(Enum):
     FLAGGED_VIDEO = 9
     ALREADY_FLAGGED = 10
     NO_FLAG = 11
+    INVALID_CURSOR = 12
+    INVALID_PAGE = 13
 
 
 class VideoPlayer:
     """A class used to represent a Video Player."""
 
-    def __init__(self):
-        self._video_library = VideoLibrary()
+    def __init__(self, input_reader=None, output=None, library=None,
+                 playlist_store=None, defer_answers=False):
+        """The VideoPlayer class is initialized.
+
+        Args:
+            input_reader: A callable returning the user's answer when a
+                search asks which result to play. Defaults to reading a
+                line with input().
+            output: The OutputSink every message is written to. Defaults
+                to a StdoutSink.
+            library: The VideoLibrary to play from. Players given the same
+                library share its videos and flags, but each keeps its own
+                playback state and playlists. Defaults to a new library.
+            playlist_store: A PlaylistStore the playlists are loaded from
+                and every playlist change is saved to. Without one,
+                playlists only last as long as the player.
+            defer_answers: If True, a search asking which result to play
+                returns without reading an answer. The caller reads it
+                whenever it likes and passes it to answer, so that no
+                thread waits for the user.
+        """
+        self._video_library = library if library is not None else VideoLibrary()
         self._vid_playing = None
         self._paused = False
         self._playlists = {}
+        self._playlist_names = PrefixIndex()
+        self._input_reader = input_reader
+        self._defer_answers = defer_answers
+        # The results a deferred search question is about, until answered.
+        self._pending_results = None
+        self._out = output if output is not None else StdoutSink()
+        self._playlist_store = playlist_store
+        if playlist_store is not None:
+            self._load_playlists()
+
+    def _load_playlists(self):
+        """Rebuilds the playlists saved in the playlist store."""
+        for title, video_ids in self._playlist_store.playlists():
+            playlist = Playlist(title)
+            for video_id in video_ids:
+                vid = self._video_library.get_video(video_id)
+                # Videos no longer in the library are dropped.
+                if vid:
+                    playlist.add(vid)
+            self._playlists[title.upper()] = playlist
+            self._playlist_names.add(title)
+
+    @property
+    def output(self):
+        """Returns the OutputSink the player writes to."""
+        return self._out
+
+    @property
+    def awaiting_answer(self):
+        """Returns whether a search is waiting for a deferred answer."""
+        return self._pending_results is not None
+
+    def answer(self, answer):
+        """Answers the question of the last search, when answers are deferred.
+
+        Args:
+            answer: The number of the result to play. Anything else plays
+                nothing.
+        """
+        results, self._pending_results = self._pending_results, None
+        if results is not None:
+            self._play_search_answer(results, answer)
+
+    def _play_search_answer(self, results, answer):
+        if answer.isnumeric() and (0 <= int(answer) <= len(results)):
+            self.play_video(results[int(answer) - 1].video_id)
+
+    def _read_input(self):
+        if self._input_reader is None:
+            # The user has to see the question before answering it.
+            self._out.flush()
+            return input()
+        return self._input_reader()
 
     def number_of_videos(self):
-        num_videos = len(self._video_library.get_all_videos())
-        print(f"{num_videos} videos in the library")
+        num_videos = len(self._video_library)
+        self._out.write(f"{num_videos} videos in the library")
 
     def error_msg(self, error, action="", playlist_name="", vid=None):
+        self._out.write(self._error_text(error, action, playlist_name, vid))
+
+    def _error_text(self, error, action="", playlist_name="", vid=None):
         if error == Errors.NO_VIDEO:
-            print("Cannot play video: Video does not exist")
+            return "Cannot play video: Video does not exist"
         elif error == Errors.NO_VIDEO_PLAYING:
-            print(f"Cannot {action} video: No video is currently playing")
+            return f"Cannot {action} video: No video is currently playing"
         elif error == Errors.PAUSED:
-            print(f"Video already paused: {self._vid_playing.title}")
+            return f"Video already paused: {self._vid_playing.title}"
         elif error == Errors.NOT_PAUSED:
-            print("Cannot continue video: Video is not paused")
+            return "Cannot continue video: Video is not paused"
         elif error == Errors.NAME_USED:
-            print("Cannot create playlist: A playlist with the same name already exists")
+            return "Cannot create playlist: A playlist with the same name already exists"
         elif error == Errors.VIDEO_DOES_NOT_EXIST:
-            print(f"Cannot {action} {playlist_name}: Video does not exist")
+            return f"Cannot {action} {playlist_name}: Video does not exist"
         elif error == Errors.NOT_IN_PLAYLIST:
-            print(f"Cannot {action} {playlist_name}: Video is not in playlist")
+            return f"Cannot {action} {playlist_name}: Video is not in playlist"
         elif error == Errors.PLAYLIST_DOES_NOT_EXIST:
-            print(f"Cannot {action} {playlist_name}: Playlist does not exist")
+            return f"Cannot {action} {playlist_name}: Playlist does not exist"
         elif error == Errors.VIDEO_IN_PLAYLIST:
-            print(f"Cannot {action} {playlist_name}: Video already added")
+            return f"Cannot {action} {playlist_name}: Video already added"
         elif error == Errors.FLAGGED_VIDEO:
-            print(f"Cannot {action} {playlist_name}: "
-                  f"Video is currently flagged (reason: {vid.flag_reason})")
+            return (f"Cannot {action} {playlist_name}: "
+                    f"Video is currently flagged (reason: {vid.flag_reason})")
         elif error == Errors.ALREADY_FLAGGED:
-            print("Cannot flag video: Video is already flagged")
+            return "Cannot flag video: Video is already flagged"
         elif error == Errors.NO_FLAG:
-            print("Cannot remove flag from video: Video is not flagged")
-
-    def show_all_videos(self):
-        """Returns all videos."""
-        print("Here's a list of all available videos:")
+            return "Cannot remove flag from video: Video is not flagged"
+        elif error == Errors.INVALID_CURSOR:
+            return f"Cannot {action}: Invalid cursor"
+        elif error == Errors.INVALID_PAGE:
+            return f"Cannot {action}: The limit and page must be at least 1"
+
+    def _page_error(self, action, limit, page):
+        """Reports the ValueError raised by _page for a listing."""
+        if _valid_paging_number(limit) and _valid_paging_number(page):
+            self.error_msg(Errors.INVALID_CURSOR, action)
+        else:
+            self.error_msg(Errors.INVALID_PAGE, action)
 
-        vid_list = self._video_library.get_all_videos()
-        vid_list.sort(key=lambda x: x.title)
+    @staticmethod
+    def _page(open_at, limit, page, cursor, keyed=True):
+        """Returns one page of a listing and the cursor to the next page.
 
-        for vid in vid_list:
-            tags = vid.format_tags()
-            if vid.flag:
-                print(f"    {vid.title} ({vid.video_id}) [{tags}] - FLAGGED (reason: {vid.flag_reason})")
+        Args:
+            open_at: Called with a number of videos to skip and a listing
+                key, or None. Returns an iterator over the videos from that
+                point on, in listing order.
+            limit: The page size. None with no page or cursor lists
+                everything.
+            page: The 1-based page number to show.
+            cursor: A cursor returned with the previous page. Only the
+                videos of the page are read, however deep into the listing.
+            keyed: Whether the listing is in title order, so cursors can
+                hold a listing key rather than an offset.
+
+        Returns:
+            The videos of the page, and the cursor to the next page or None
+            if this is the last one. When the listing is not paged, the
+            videos come as an iterator.
+
+        Raises:
+            ValueError: The limit or page is below 1, or the cursor is not
+                valid for this listing.
+        """
+        if not (_valid_paging_number(limit) and _valid_paging_number(page)):
+            raise ValueError(f"Invalid limit or page: {limit}, {page}")
+        if limit is None and page is None and cursor is None:
+            return open_at(0, None), None
+        if limit is None:
+            limit = DEFAULT_PAGE_SIZE
+        start, after = 0, None
+        if cursor is not None:
+            position = _decode_cursor(cursor, keyed)
+            if keyed:
+                after = position
             else:
-                print(f"    {vid.title} ({vid.video_id}) [{tags}]")
+                start = position
+        elif page is not None:
+            start = (page - 1) * limit
+        videos = list(islice(open_at(start, after), limit + 1))
+        next_cursor = None
+        if len(videos) > limit:
+            del videos[limit:]
+            next_cursor = _encode_cursor(
+                VideoLibrary.listing_key(videos[-1]) if keyed
+                else start + limit)
+        return videos, next_cursor
+
+    def show_all_videos(self, limit=None, page=None, cursor=None):
+        """Returns all videos.
+
+        Args:
+            limit: The number of videos per page, if paged.
+            page: The 1-based page to show.
+            cursor: The cursor to the page to show, as printed after the
+                previous page.
+        """
+        try:
+            videos, next_cursor = self._page(
+                lambda start, after: self._video_library.iter_videos(start, after),
+                limit, page, cursor)
+        except ValueError:
+            self._page_error("show videos", limit, page)
+            return
+        self._out.write("Here's a list of all available videos:")
+        # An unpaged listing is an iterator, which is always true.
+        if videos or not len(self._video_library):
+            self._out.write_lines(vid.format_row() for vid in videos)
+            self._write_next_cursor(next_cursor)
+        else:
+            self._out.write("    No more results")
+
+    def _write_next_cursor(self, next_cursor):
+        if next_cursor is not None:
+            self._out.write(f"Next cursor: {next_cursor}")
 
     def play_video(self, video_id):
         """Plays the respective video.
@@ -87,17 +288,18 @@ class VideoPlayer:
                 self.stop_video()
             self._vid_playing = self._video_library.get_video(video_id)
             self._paused = False
-            if self._vid_playing.flag:
-                print(f"Cannot play video: Video is currently flagged (reason: {self._vid_playing.flag_reason})")
+            reason = self._vid_playing.flagged_reason
+            if reason is not None:
+                self._out.write(f"Cannot play video: Video is currently flagged (reason: {reason})")
             else:
-                print(f"Playing video: {self._vid_playing.title}")
+                self._out.write(f"Playing video: {self._vid_playing.title}")
         else:
             self.error_msg(Errors.NO_VIDEO)
 
     def stop_video(self):
         """Stops the current video."""
         if self._vid_playing:
-            print(f"Stopping video: {self._vid_playing.title}")
+            self._out.write(f"Stopping video: {self._vid_playing.title}")
             self._vid_playing = None
             self._paused = False
         else:
@@ -105,18 +307,11 @@ class VideoPlayer:
 
     def play_random_video(self):
         """Plays a random video from the video library."""
-        videos = self._video_library.get_all_videos()
-        vid = choice(videos)
-        while vid.flag:
-            videos.remove(vid)
-            if videos:
-                vid = choice(videos)
-            else:
-                break
-        if videos:
+        vid = self._video_library.get_random_playable_video()
+        if vid:
             self.play_video(vid.video_id)
         else:
-            print("No videos available")
+            self._out.write("No videos available")
 
     def pause_video(self):
         """Pauses the current video."""
@@ -124,7 +319,7 @@ class VideoPlayer:
             if self._paused:
                 self.error_msg(Errors.PAUSED)
             else:
-                print(f"Pausing video: {self._vid_playing.title}")
+                self._out.write(f"Pausing video: {self._vid_playing.title}")
                 self._paused = True
         else:
             self.error_msg(Errors.NO_VIDEO_PLAYING, "pause")
@@ -133,7 +328,7 @@ class VideoPlayer:
         """Resumes playing the current video."""
         if self._vid_playing:
             if self._paused:
-                print(f"Continuing video: {self._vid_playing.title}")
+                self._out.write(f"Continuing video: {self._vid_playing.title}")
             else:
                 self.error_msg(Errors.NOT_PAUSED)
         else:
@@ -145,11 +340,11 @@ class VideoPlayer:
         if vid:
             tags = vid.format_tags()
             if self._paused:
-                print(f"Currently playing: {vid.title} ({vid.video_id}) [{tags}] - PAUSED")
+                self._out.write(f"Currently playing: {vid.title} ({vid.video_id}) [{tags}] - PAUSED")
             else:
-                print(f"Currently playing: {vid.title} ({vid.video_id}) [{tags}]")
+                self._out.write(f"Currently playing: {vid.title} ({vid.video_id}) [{tags}]")
         else:
-            print("No video is currently playing")
+            self._out.write("No video is currently playing")
 
     def create_playlist(self, playlist_name):
         """Creates a playlist with a given name.
@@ -161,7 +356,10 @@ class VideoPlayer:
             self.error_msg(Errors.NAME_USED)
         else:
             self._playlists[playlist_name.upper()] = Playlist(playlist_name)
-            print(f"Successfully created new playlist: {playlist_name}")
+            self._playlist_names.add(playlist_name)
+            if self._playlist_store is not None:
+                self._playlist_store.created(playlist_name)
+            self._out.write(f"Successfully created new playlist: {playlist_name}")
 
     def add_to_playlist(self, playlist_name, video_id):
         """Adds a video to a playlist with a given name.
@@ -175,43 +373,94 @@ class VideoPlayer:
             if vid:
                 if vid.flag:
                     self.error_msg(Errors.FLAGGED_VIDEO, "add video to", playlist_name, vid)
-                elif vid in self._playlists[playlist_name.upper()].videos:
+                elif vid in self._playlists[playlist_name.upper()]:
                     self.error_msg(Errors.VIDEO_IN_PLAYLIST, "add video to", playlist_name)
                 else:
-                    self._playlists[playlist_name.upper()].videos.append(vid)
-                    print(f"Added video to {playlist_name}: {vid.title}")
+                    self._playlists[playlist_name.upper()].add(vid)
+                    if self._playlist_store is not None:
+                        self._playlist_store.added(playlist_name, video_id)
+                    self._out.write(f"Added video to {playlist_name}: {vid.title}")
             else:
                 self.error_msg(Errors.VIDEO_DOES_NOT_EXIST, "add video to", playlist_name)
         else:
             self.error_msg(Errors.PLAYLIST_DOES_NOT_EXIST, "add video to", playlist_name)
 
+    def bulk_add_to_playlist(self, playlist_name, *video_ids):
+        """Adds several videos to a playlist with a given name.
+
+        Every video is checked as add_to_playlist checks it. One summary
+        line is shown, followed by the error of each video not added.
+
+        Args:
+            playlist_name: The playlist name.
+            video_ids: The video_ids to be added, in order.
+        """
+        playlist = self._playlists.get(playlist_name.upper())
+        if playlist is None:
+            self.error_msg(Errors.PLAYLIST_DOES_NOT_EXIST, "add video to", playlist_name)
+            return
+        added = 0
+        errors = []
+        for video_id in video_ids:
+            vid = self._video_library.get_video(video_id)
+            if not vid:
+                error = self._error_text(Errors.VIDEO_DOES_NOT_EXIST, "add video to", playlist_name)
+            elif vid.flag:
+                error = self._error_text(Errors.FLAGGED_VIDEO, "add video to", playlist_name, vid)
+            elif vid in playlist:
+                error = self._error_text(Errors.VIDEO_IN_PLAYLIST, "add video to", playlist_name)
+            else:
+                playlist.add(vid)
+                if self._playlist_store is not None:
+                    self._playlist_store.added(playlist_name, video_id)
+                added += 1
+                continue
+            errors.append((video_id, error))
+        self._out.write(f"Added {_count_videos(added)} to {playlist_name}")
+        self._write_bulk_errors(errors)
+
+    def _write_bulk_errors(self, errors):
+        """Lists the (video_id, message) errors of a bulk command."""
+        self._out.write_lines(
+            f"    {video_id} - {error}" for video_id, error in errors)
+
     def show_all_playlists(self):
         """Display all playlists."""
         if self._playlists:
-            print("Showing all playlists: ")
-            for p in sorted(self._playlists.values(), key=lambda x: x.title):
-                print(f"    {p.title}")
+            self._out.write("Showing all playlists: ")
+            self._out.write_lines(
+                f"    {p.title}"
+                for p in sorted(self._playlists.values(), key=lambda x: x.title))
         else:
-            print("No playlists exist yet")
+            self._out.write("No playlists exist yet")
 
-    def show_playlist(self, playlist_name):
+    def show_playlist(self, playlist_name, limit=None, page=None, cursor=None):
         """Display all videos in a playlist with a given name.
 
         Args:
             playlist_name: The playlist name.
+            limit: The number of videos per page, if paged.
+            page: The 1-based page to show.
+            cursor: The cursor to the page to show, as printed after the
+                previous page.
         """
         if playlist_name.upper() in self._playlists:
-            print(f"Showing playlist: {playlist_name}")
-            video_list = self._playlists[playlist_name.upper()].videos
-            if video_list:
-                for vid in video_list:
-                    tags = vid.format_tags()
-                    if vid.flag:
-                        print(f"    {vid.title} ({vid.video_id}) [{tags}] - FLAGGED (reason: {vid.flag_reason})")
-                    else:
-                        print(f"    {vid.title} ({vid.video_id}) [{tags}]")
+            playlist = self._playlists[playlist_name.upper()]
+            try:
+                videos, next_cursor = self._page(
+                    lambda start, after: islice(playlist, start, None),
+                    limit, page, cursor, keyed=False)
+            except ValueError:
+                self._page_error("show playlist", limit, page)
+                return
+            self._out.write(f"Showing playlist: {playlist_name}")
+            if not playlist:
+                self._out.write("    No videos here yet")
+            elif videos:
+                self._out.write_lines(vid.format_row() for vid in videos)
+                self._write_next_cursor(next_cursor)
             else:
-                print("    No videos here yet")
+                self._out.write("    No more results")
         else:
             self.error_msg(Errors.PLAYLIST_DOES_NOT_EXIST, "show playlist", playlist_name)
 
@@ -226,9 +475,11 @@ class VideoPlayer:
             vid = self._video_library.get_video(video_id)
             if vid is None:
                 self.error_msg(Errors.VIDEO_DOES_NOT_EXIST, "remove video from", playlist_name)
-            elif vid in self._playlists[playlist_name.upper()].videos:
-                self._playlists[playlist_name.upper()].videos.remove(vid)
-                print(f"Removed video from {playlist_name}: {vid.title}")
+            elif vid in self._playlists[playlist_name.upper()]:
+                self._playlists[playlist_name.upper()].remove(vid)
+                if self._playlist_store is not None:
+                    self._playlist_store.removed(playlist_name, video_id)
+                self._out.write(f"Removed video from {playlist_name}: {vid.title}")
             else:
                 self.error_msg(Errors.NOT_IN_PLAYLIST, "remove video from", playlist_name)
         else:
@@ -242,7 +493,9 @@ class VideoPlayer:
         """
         if playlist_name.upper() in self._playlists:
             self._playlists[playlist_name.upper()].clear()
-            print(f"Successfully removed all videos from {playlist_name}")
+            if self._playlist_store is not None:
+                self._playlist_store.cleared(playlist_name)
+            self._out.write(f"Successfully removed all videos from {playlist_name}")
         else:
             self.error_msg(Errors.PLAYLIST_DOES_NOT_EXIST, "clear playlist", playlist_name)
 
@@ -253,66 +506,136 @@ class VideoPlayer:
             playlist_name: The playlist name.
         """
         if playlist_name.upper() in self._playlists:
-            del self._playlists[playlist_name.upper()]
-            print(f"Deleted playlist: {playlist_name}")
+            playlist = self._playlists.pop(playlist_name.upper())
+            self._playlist_names.remove(playlist.title)
+            if self._playlist_store is not None:
+                self._playlist_store.deleted(playlist_name)
+            self._out.write(f"Deleted playlist: {playlist_name}")
         else:
             self.error_msg(Errors.PLAYLIST_DOES_NOT_EXIST, "delete playlist", playlist_name)
 
-    def search_videos(self, search_term):
-        """Display all the videos whose titles contain the search_term.
+    def _show_search_results(self, search_term, results, next_cursor=None,
+                             matched=False):
+        """Lists search results and plays the one the user picks.
 
         Args:
-            search_term: The query to be used in search.
+            search_term: The query shown in the results header.
+            results: The matching Video objects, in display order.
+            next_cursor: The cursor to the next page of results, if any.
+            matched: Whether the search matched any videos, so an empty
+                page past the last result is not shown as no results.
         """
-        videos = sorted(self._video_library.get_all_videos(), key=lambda x: x.title)
-        results = []
-        for vid in videos:
-            if search_term.upper() in vid.title.upper():
-                if not vid.flag:
-                    results.append(vid)
-
-        if results:
-            print(f"Here are the results for {search_term}:")
-            for i in range(len(results)):
-                v = results[i]
-                tags = v.format_tags()
-                print(f"  {i+1}) {v.title} ({v.video_id}) [{tags}]")
-
-            print("Would you like to play any of the above? If yes, specify the number of the video. ")
-            print("If your answer is not a valid number, we will assume it's a no.")
-            index = input()
-            if index.isnumeric() and (0 <= int(index) <= len(results)):
-                self.play_video(results[int(index) - 1].video_id)
+        if not results and matched:
+            self._out.write(f"Here are the results for {search_term}:")
+            self._out.write("    No more results")
+        elif results:
+            self._out.write(f"Here are the results for {search_term}:")
+            self._out.write_lines(
+                f"  {i}) {v.title} ({v.video_id}) [{v.format_tags()}]"
+                for i, v in enumerate(results, 1))
+            self._write_next_cursor(next_cursor)
+
+            self._out.write("Would you like to play any of the above? If yes, specify the number of the video. ")
+            self._out.write("If your answer is not a valid number, we will assume it's a no.")
+            if self._defer_answers:
+                self._pending_results = results
+            else:
+                self._play_search_answer(results, self._read_input())
         else:
-            print(f"No search results for {search_term}")
+            self._out.write(f"No search results for {search_term}")
 
-    def search_videos_tag(self, video_tag):
+    def search_videos(self, search_term, limit=None, page=None, cursor=None):
+        """Display all the videos whose titles contain the search_term.
+
+        Args:
+            search_term: The query to be used in search.
+            limit: The number of results per page, if paged.
+            page: The 1-based page of results to show.
+            cursor: The cursor to the page to show, as printed after the
+                previous page.
+        """
+        matches = self._video_library.search_playable_titles(search_term)
+        try:
+            results, next_cursor = self._page(
+                matches.iter_from, limit, page, cursor)
+        except ValueError:
+            self._page_error("search videos", limit, page)
+            return
+        results = list(results)
+        self._show_search_results(search_term, results, next_cursor,
+                                  bool(results or matches))
+
+    def search_videos_tag(self, video_tag, limit=None, page=None, cursor=None):
         """Display all videos whose tags contains the provided tag.
 
         Args:
             video_tag: The video tag to be used in search.
+            limit: The number of results per page, if paged.
+            page: The 1-based page of results to show.
+            cursor: The cursor to the page to show, as printed after the
+                previous page.
         """
-        videos = sorted(self._video_library.get_all_videos(), key=lambda x: x.title)
-        results = []
-        for vid in videos:
-            if video_tag.lower() in vid.tags:
-                if not vid.flag:
-                    results.append(vid)
-
-        if results:
-            print(f"Here are the results for {video_tag}:")
-            for i in range(len(results)):
-                v = results[i]
-                tags = v.format_tags()
-                print(f"  {i+1}) {v.title} ({v.video_id}) [{tags}]")
-
-            print("Would you like to play any of the above? If yes, specify the number of the video. ")
-            print("If your answer is not a valid number, we will assume it's a no.")
-            index = input()
-            if index.isnumeric() and (0 <= int(index) <= len(results)):
-                self.play_video(results[int(index) - 1].video_id)
+        matches = self._video_library.playable_videos_with_tag(video_tag)
+        try:
+            results, next_cursor = self._page(
+                matches.iter_from, limit, page, cursor)
+        except ValueError:
+            self._page_error("search videos", limit, page)
+            return
+        results = list(results)
+        self._show_search_results(video_tag, results, next_cursor,
+                                  bool(results or matches))
+
+    def search_videos_ranked(self, *search_terms, k=10):
+        """Display the videos whose titles and tags best match the terms.
+
+        Args:
+            search_terms: The words to search for.
+            k: The most results to show.
+        """
+        query = " ".join(search_terms)
+        self._show_search_results(
+            query, self._video_library.search_ranked(query, k))
+
+    def search_videos_fuzzy(self, *search_terms):
+        """Display the videos whose titles nearly match the terms.
+
+        Args:
+            search_terms: The words to search for, which may be misspelled.
+        """
+        query = " ".join(search_terms)
+        self._show_search_results(
+            query, [vid for vid in self._video_library.search_fuzzy(query)
+                    if not vid.flag])
+
+    def complete_video_ids(self, prefix, limit=None):
+        """Returns the video ids starting with prefix, ignoring case."""
+        return self._video_library.complete_video_ids(prefix, limit)
+
+    def complete_playlists(self, prefix, limit=None):
+        """Returns the playlist names starting with prefix, ignoring case."""
+        return self._playlist_names.complete(prefix, limit)
+
+    def complete(self, *prefix_words):
+        """Display the video ids, titles and playlist names with a prefix.
+
+        Args:
+            prefix_words: The words of the prefix, which titles and playlist
+                names may contain.
+        """
+        prefix = " ".join(prefix_words)
+        names = merge(
+            self.complete_video_ids(prefix, COMPLETION_LIMIT),
+            self._video_library.complete_titles(prefix, COMPLETION_LIMIT),
+            self.complete_playlists(prefix, COMPLETION_LIMIT),
+            key=str.lower)
+        # A playlist may share its name with a video title.
+        names = list(islice(dict.fromkeys(names), COMPLETION_LIMIT))
+        if names:
+            self._out.write(f"Completions for {prefix}:")
+            self._out.write_lines(f"    {name}" for name in names)
         else:
-            print(f"No search results for {video_tag}")
+            self._out.write(f"No completions for {prefix}")
 
     def flag_video(self, video_id, flag_reason="Not supplied"):
         """Mark a video as flagged.
@@ -323,16 +646,59 @@ class VideoPlayer:
         """
         vid = self._video_library.get_video(video_id)
         if vid:
-            if vid.flag:
+            if not self._video_library.flag_video(video_id, flag_reason):
                 self.error_msg(Errors.ALREADY_FLAGGED)
             else:
-                vid.set_flag(flag_reason)
                 if self._vid_playing == vid:
                     self.stop_video()
-                print(f"Successfully flagged video: {vid.title} (reason: {flag_reason})")
+                self._out.write(f"Successfully flagged video: {vid.title} (reason: {flag_reason})")
         else:
             self.error_msg(Errors.VIDEO_DOES_NOT_EXIST, "flag", "video")
 
+    def bulk_flag_video(self, *video_ids, flag_reason="Not supplied"):
+        """Mark several videos as flagged.
+
+        Every video is checked as flag_video checks it. One summary line
+        is shown, followed by the error of each video not flagged.
+
+        Args:
+            video_ids: The video_ids to be flagged, in order.
+            flag_reason: Reason for flagging the videos.
+        """
+        results = self._video_library.flag_videos(video_ids, flag_reason)
+        if self._vid_playing is not None and any(
+                flagged and video_id == self._vid_playing.video_id
+                for video_id, flagged in zip(video_ids, results)):
+            self.stop_video()
+        errors = [
+            (video_id,
+             self._error_text(Errors.ALREADY_FLAGGED)
+             if self._video_library.get_video(video_id)
+             else self._error_text(Errors.VIDEO_DOES_NOT_EXIST, "flag", "video"))
+            for video_id, flagged in zip(video_ids, results) if not flagged]
+        self._out.write(f"Successfully flagged {_count_videos(results.count(True))} "
+                        f"(reason: {flag_reason})")
+        self._write_bulk_errors(errors)
+
+    def bulk_allow_video(self, *video_ids):
+        """Removes the flags from several videos.
+
+        Every video is checked as allow_video checks it. One summary line
+        is shown, followed by the error of each video not allowed.
+
+        Args:
+            video_ids: The video_ids to be allowed again, in order.
+        """
+        results = self._video_library.allow_videos(video_ids)
+        errors = [
+            (video_id,
+             self._error_text(Errors.NO_FLAG)
+             if self._video_library.get_video(video_id)
+             else self._error_text(Errors.VIDEO_DOES_NOT_EXIST, "remove flag from", "video"))
+            for video_id, allowed in zip(video_ids, results) if not allowed]
+        self._out.write(f"Successfully removed flag from {_count_videos(results.count(True))}")
+        self._write_bulk_errors(errors)
+
     def allow_video(self, video_id):
         """Removes a flag from a video.
 
@@ -341,9 +707,8 @@ class VideoPlayer:
         """
         vid = self._video_library.get_video(video_id)
         if vid:
-            if vid.flag:
-                vid.allow()
-                print(f"Successfully removed flag from video: {vid.title}")
+            if self._video_library.allow_video(video_id):
+                self._out.write(f"Successfully removed flag from video: {vid.title}")
             else:
                 self.error_msg(Errors.NO_FLAG)
         else:
@@ -2,10 +2,37 @@
 
 
 class Playlist:
-    """A class used to represent a Playlist."""
+    """A class used to represent a Playlist.
+
+    The videos are held in a dict keyed by video id. Dicts keep insertion
+    order, so the playlist is shown in the order videos were added while
+    membership checks, additions and removals stay constant time.
+    """
     def __init__(self, title):
         self.title = title
-        self.videos = []
+        self._videos = {}
+
+    @property
+    def videos(self):
+        """Returns a read-only view of the videos, in the order added."""
+        return self._videos.values()
+
+    def __len__(self):
+        return len(self._videos)
+
+    def __iter__(self):
+        return iter(self._videos.values())
+
+    def __contains__(self, video):
+        return video.video_id in self._videos
+
+    def add(self, video):
+        """Appends a video to the end of the playlist."""
+        self._videos[video.video_id] = video
+
+    def remove(self, video):
+        """Removes a video from the playlist. Does nothing if absent."""
+        self._videos.pop(video.video_id, None)
 
     def clear(self):
-        self.videos = []
+        self._videos = {}
@@ -0,0 +1,35 @@
+import argparse
+
+from src.app_state import AppState
+from src.app_state import add_state_arguments
+
+
+def _parse(argv):
+    arg_parser = argparse.ArgumentParser()
+    add_state_arguments(arg_parser, "video flags")
+    return arg_parser.parse_args(argv)
+
+
+def test_state_dir_keeps_flags_and_a_catalog_snapshot(tmp_path):
+    state = AppState(_parse(["--state-dir", str(tmp_path), "--stats"]))
+    try:
+        assert state.playlist_store is None
+        assert state.stats is not None
+        assert state.library.flag_video("funny_dogs_video_id")
+    finally:
+        state.close()
+    assert (tmp_path / "catalog.snapshot").exists()
+
+    state = AppState(_parse(["--state-dir", str(tmp_path)]))
+    try:
+        assert state.stats is None
+        assert state.library.get_video("funny_dogs_video_id").flag
+    finally:
+        state.close()
+
+
+def test_stats_file_is_written_on_close(tmp_path):
+    stats_file = tmp_path / "stats.json"
+    state = AppState(_parse(["--stats-file", str(stats_file)]))
+    state.close()
+    assert stats_file.exists()
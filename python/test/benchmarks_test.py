@@ -0,0 +1,45 @@
+import warnings
+
+from benchmarks.catalog_generator import CatalogSpec
+from benchmarks.catalog_generator import flagged_ids
+from benchmarks.catalog_generator import write_catalog
+from benchmarks.run import compare
+from benchmarks.run import run_benchmarks
+from src.catalog import read_catalog
+
+
+def test_generated_catalog_parses(tmp_path):
+    spec = CatalogSpec(size=300, tag_count=20, flagged_fraction=0.1)
+    path = tmp_path / "videos.txt"
+    write_catalog(path, spec)
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        entries = list(read_catalog(path))
+    assert len(entries) == 300
+    assert len({video_id for _, video_id, _ in entries}) == 300
+    assert all(1 <= len(title.split()) <= 12 for title, _, _ in entries)
+    assert len({tag for _, _, tags in entries for tag in tags}) <= 20
+    assert len(flagged_ids(spec)) == 30
+
+
+def test_generated_catalog_is_repeatable(tmp_path):
+    write_catalog(tmp_path / "a.txt", CatalogSpec(size=50, seed=7))
+    write_catalog(tmp_path / "b.txt", CatalogSpec(size=50, seed=7))
+    assert (tmp_path / "a.txt").read_text() == (tmp_path / "b.txt").read_text()
+
+
+def test_run_benchmarks_covers_every_group(tmp_path):
+    results = run_benchmarks([50], CatalogSpec(), str(tmp_path), repeat=2,
+                             budget=0.01)
+    names = {(result["group"], result["name"]) for result in results}
+    assert ("load", "snapshot") in names
+    assert ("command", "SEARCH_RANKED") in names
+    assert ("dispatch", "parser") in names
+    assert all(result["min_ns"] <= result["max_ns"] for result in results)
+
+
+def test_compare_reports_slower_results():
+    baseline = [{"size": 10, "group": "command", "name": "HELP", "min_ns": 100}]
+    slower = [dict(baseline[0], min_ns=200)]
+    assert compare(slower, baseline, 1.5) == [(slower[0], baseline[0])]
+    assert compare(baseline, baseline, 1.5) == []
@@ -0,0 +1,52 @@
+import os
+import shutil
+from pathlib import Path
+
+from src.catalog_snapshot import CatalogSnapshot
+from src.video_library import VideoLibrary
+
+VIDEOS_TXT = Path(__file__).parent.parent / "src" / "videos.txt"
+
+
+def test_library_loads_from_snapshot(tmp_path):
+    catalog = tmp_path / "videos.txt"
+    shutil.copy(VIDEOS_TXT, catalog)
+    snapshot_path = tmp_path / "videos.snapshot"
+
+    library = VideoLibrary(catalog, snapshot_path=snapshot_path)
+
+    assert snapshot_path.exists()
+    assert len(library) == 5
+    video = library.get_video("amazing_cats_video_id")
+    assert video.title == "Amazing Cats"
+    assert set(video.tags) == {"#cat", "#animal"}
+    assert library.get_video("nothing_video_id").tags == ()
+
+
+def test_snapshot_lookup_by_id(tmp_path):
+    catalog = tmp_path / "videos.txt"
+    shutil.copy(VIDEOS_TXT, catalog)
+    snapshot_path = tmp_path / "videos.snapshot"
+    VideoLibrary(catalog, snapshot_path=snapshot_path)
+
+    snapshot = CatalogSnapshot(snapshot_path)
+
+    assert snapshot.get("life_at_google_video_id") == (
+        "Life at Google", "life_at_google_video_id", ["#google", "#career"])
+    assert snapshot.get("does_not_exist") is None
+    assert snapshot.is_fresh(catalog)
+
+
+def test_snapshot_is_rebuilt_when_catalog_changes(tmp_path):
+    catalog = tmp_path / "videos.txt"
+    shutil.copy(VIDEOS_TXT, catalog)
+    snapshot_path = tmp_path / "videos.snapshot"
+    VideoLibrary(catalog, snapshot_path=snapshot_path)
+
+    with open(catalog, "a") as catalog_file:
+        catalog_file.write("\nNew Video | new_video_id | #new")
+    os.utime(catalog, ns=(0, 0))
+    library = VideoLibrary(catalog, lazy=True, snapshot_path=snapshot_path)
+
+    assert len(library) == 6
+    assert library.get_video("new_video_id").title == "New Video"
@@ -0,0 +1,89 @@
+import warnings
+
+import pytest
+
+from src import catalog
+from src.catalog import CatalogWarning
+from src.catalog import MappedCatalog
+from src.catalog import read_catalog
+from src.catalog import read_catalog_parallel
+
+CATALOG_LINES = [
+    "Funny Dogs | funny_dogs_video_id |  #dog , #animal",
+    "just a title",
+    "",
+    "Amazing Cats | amazing_cats_video_id |  #cat , #animal",
+    "Broken | broken_video_id",
+    "Video about nothing | nothing_video_id |",
+]
+
+
+def _write_catalog(tmp_path, lines):
+    path = tmp_path / "videos.txt"
+    path.write_text("\n".join(lines) + "\n")
+    return path
+
+
+def test_read_catalog_reports_malformed_lines(tmp_path):
+    path = _write_catalog(tmp_path, CATALOG_LINES)
+
+    with pytest.warns(CatalogWarning) as record:
+        entries = list(read_catalog(path))
+
+    assert [entry[1] for entry in entries] == [
+        "funny_dogs_video_id", "amazing_cats_video_id", "nothing_video_id"]
+    messages = [str(warning.message) for warning in record]
+    assert len(messages) == 2
+    assert "line 2 " in messages[0]
+    assert "line 5 " in messages[1]
+
+
+def test_read_catalog_parallel_matches_serial(tmp_path, monkeypatch):
+    # Force chunking even though the file is tiny.
+    monkeypatch.setattr(catalog, "_MIN_CHUNK_SIZE", 0)
+    path = _write_catalog(tmp_path, CATALOG_LINES * 20)
+
+    with pytest.warns(CatalogWarning) as record:
+        entries = read_catalog_parallel(path, workers=2)
+
+    with pytest.warns(CatalogWarning):
+        assert entries == list(read_catalog(path))
+    line_numbers = [int(str(warning.message).split()[3]) for warning in record]
+    assert line_numbers == [number for i in range(20)
+                            for number in (6 * i + 2, 6 * i + 5)]
+
+
+def test_read_catalog_parallel_keeps_unusual_line_breaks_in_titles(
+        tmp_path, monkeypatch):
+    monkeypatch.setattr(catalog, "_MIN_CHUNK_SIZE", 0)
+    path = tmp_path / "videos.txt"
+    path.write_text(
+        "Page\x0cBreak | page_break_video_id | #odd\n"
+        "Line\u2028Separator | line_separator_video_id |\n"
+        "Group\x1dSeparator | group_separator_video_id |\n" * 10,
+        encoding="utf-8")
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("error", CatalogWarning)
+        entries = read_catalog_parallel(path, workers=2)
+        assert entries == list(read_catalog(path))
+    assert entries[0] == ("Page\x0cBreak", "page_break_video_id", ["#odd"])
+
+
+def test_mapped_catalog_indexes_the_lines_read_catalog_accepts(tmp_path):
+    path = _write_catalog(tmp_path, CATALOG_LINES + [
+        '"Quoted | title" | quoted_video_id | #a',
+        "Too | many | fields | here",
+    ])
+
+    with pytest.warns(CatalogWarning):
+        entries = list(read_catalog(path))
+    mapped = MappedCatalog(path)
+    try:
+        assert len(mapped) == len(entries) == 4
+        assert list(mapped) == entries
+        assert mapped.get("quoted_video_id") == (
+            "Quoted | title", "quoted_video_id", ["#a"])
+        assert mapped.get("broken_video_id") is None
+    finally:
+        mapped.close()
@@ -0,0 +1,229 @@
+import pytest
+
+from src import command_parser
+from src.command_parser import CommandException
+from src.command_parser import CommandParser
+from src.command_parser import register_command
+from src.output import ListSink
+from src.video_library import VideoLibrary
+from src.video_player import VideoPlayer
+
+
+def test_dispatch_is_case_insensitive():
+    sink = ListSink()
+    parser = CommandParser(VideoPlayer(output=sink))
+    parser.execute_command(["number_of_videos"])
+    assert sink.lines == ["5 videos in the library"]
+
+
+def test_wrong_arity_raises_usage():
+    parser = CommandParser(VideoPlayer(output=ListSink()))
+    with pytest.raises(CommandException,
+                       match="Please enter PLAY command followed by video_id."):
+        parser.execute_command(["PLAY"])
+
+
+def test_registered_command_is_dispatched_and_listed(monkeypatch):
+    monkeypatch.setattr(command_parser, "COMMANDS",
+                        dict(command_parser.COMMANDS))
+    register_command("ECHO", lambda parser, word: parser.output.write(word),
+                     "ECHO <word> - Repeats a word.", (1,), "ECHO needs a word.")
+    sink = ListSink()
+    parser = CommandParser(VideoPlayer(output=sink))
+    parser.execute_command(["echo", "hello"])
+    parser.execute_command(["HELP"])
+    assert sink.lines[0] == "hello"
+    assert "    ECHO <word> - Repeats a word." in sink.lines[1].splitlines()
+
+
+def test_show_all_videos_pages_by_cursor():
+    sink = ListSink()
+    parser = CommandParser(VideoPlayer(output=sink))
+    parser.execute_command(["SHOW_ALL_VIDEOS", "limit=2"])
+    assert sink.lines[1:3] == [
+        "    Amazing Cats (amazing_cats_video_id) [#cat #animal]",
+        "    Another Cat Video (another_cat_video_id) [#cat #animal]"]
+    cursor = sink.lines[-1].split(": ")[1]
+    del sink.lines[:]
+    parser.execute_command(["SHOW_ALL_VIDEOS", "limit=2", f"cursor={cursor}"])
+    assert sink.lines[1:3] == [
+        "    Funny Dogs (funny_dogs_video_id) [#dog #animal]",
+        "    Life at Google (life_at_google_video_id) [#google #career]"]
+    del sink.lines[:]
+    parser.execute_command(["SHOW_ALL_VIDEOS", "limit=2", "page=3"])
+    assert sink.lines[1:] == ["    Video about nothing (nothing_video_id) []"]
+
+
+def test_listing_pages_past_the_end_show_no_more_results():
+    sink = ListSink()
+    parser = CommandParser(VideoPlayer(output=sink))
+    parser.execute_command(["CREATE_PLAYLIST", "my_playlist"])
+    parser.execute_command(["ADD_TO_PLAYLIST", "my_playlist",
+                            "nothing_video_id"])
+    del sink.lines[:]
+    parser.execute_command(["SHOW_ALL_VIDEOS", "page=2"])
+    parser.execute_command(["SHOW_PLAYLIST", "my_playlist", "page=2"])
+    assert sink.lines == [
+        "Here's a list of all available videos:",
+        "    No more results",
+        "Showing playlist: my_playlist",
+        "    No more results",
+    ]
+
+
+def test_player_rejects_paging_numbers_below_one():
+    sink = ListSink()
+    player = VideoPlayer(output=sink)
+    player.show_all_videos(limit=0)
+    player.show_all_videos(limit=2, page=0)
+    player.search_videos("cat", page=-1)
+    assert sink.lines == [
+        "Cannot show videos: The limit and page must be at least 1",
+        "Cannot show videos: The limit and page must be at least 1",
+        "Cannot search videos: The limit and page must be at least 1",
+    ]
+
+
+def test_search_page_past_the_end_is_not_no_results():
+    sink = ListSink()
+    parser = CommandParser(VideoPlayer(output=sink))
+    parser.execute_command(["SEARCH_VIDEOS", "cat", "page=2"])
+    parser.execute_command(["SEARCH_VIDEOS_WITH_TAG", "#cat", "page=2"])
+    parser.execute_command(["SEARCH_VIDEOS", "blah", "page=2"])
+    assert sink.lines == [
+        "Here are the results for cat:",
+        "    No more results",
+        "Here are the results for #cat:",
+        "    No more results",
+        "No search results for blah",
+    ]
+
+
+def test_playlist_pages_by_cursor():
+    sink = ListSink()
+    parser = CommandParser(VideoPlayer(output=sink))
+    parser.execute_command(["CREATE_PLAYLIST", "my_playlist"])
+    for video_id in ("funny_dogs_video_id", "nothing_video_id"):
+        parser.execute_command(["ADD_TO_PLAYLIST", "my_playlist", video_id])
+    del sink.lines[:]
+    parser.execute_command(["SHOW_PLAYLIST", "my_playlist", "limit=1"])
+    cursor = sink.lines[-1].split(": ")[1]
+    parser.execute_command(
+        ["SHOW_PLAYLIST", "my_playlist", "limit=1", f"cursor={cursor}"])
+    assert sink.lines[1] == "    Funny Dogs (funny_dogs_video_id) [#dog #animal]"
+    assert sink.lines[4] == "    Video about nothing (nothing_video_id) []"
+    assert not sink.lines[-1].startswith("Next cursor")
+
+
+def test_bad_paging_options():
+    sink = ListSink()
+    parser = CommandParser(VideoPlayer(output=sink))
+    parser.execute_command(["SHOW_ALL_VIDEOS", "cursor=bogus"])
+    assert sink.lines == ["Cannot show videos: Invalid cursor"]
+    with pytest.raises(CommandException, match="positive number for limit"):
+        parser.execute_command(["SHOW_ALL_VIDEOS", "limit=0"])
+    with pytest.raises(CommandException, match="either a page or a cursor"):
+        parser.execute_command(["SHOW_ALL_VIDEOS", "page=1", "cursor=MQ"])
+    with pytest.raises(CommandException, match="paging options"):
+        parser.execute_command(["SHOW_ALL_VIDEOS", "size=3"])
+
+
+def test_search_fuzzy_command():
+    sink = ListSink()
+    parser = CommandParser(VideoPlayer(input_reader=lambda: "no", output=sink))
+    parser.execute_command(["SEARCH_FUZZY", "Amzing", "cts"])
+    assert sink.lines[:2] == [
+        "Here are the results for Amzing cts:",
+        "  1) Amazing Cats (amazing_cats_video_id) [#cat #animal]"]
+    with pytest.raises(CommandException, match="SEARCH_FUZZY command"):
+        parser.execute_command(["SEARCH_FUZZY"])
+
+
+def test_completions_follow_argument_kinds():
+    parser = CommandParser(VideoPlayer(output=ListSink()))
+    parser.execute_command(["CREATE_PLAYLIST", "Favourites"])
+    assert parser.completions([], "pla") == ["PLAY", "PLAY_RANDOM"]
+    assert parser.completions(["play"], "AMAZ") == ["amazing_cats_video_id"]
+    assert parser.completions(["ADD_TO_PLAYLIST"], "fav") == ["Favourites"]
+    assert parser.completions(["ADD_TO_PLAYLIST", "Favourites"], "f") == [
+        "funny_dogs_video_id"]
+    assert parser.completions(["SHOW_ALL_VIDEOS"], "a") == []
+    assert parser.completions(["UNKNOWN"], "a") == []
+    parser.execute_command(["DELETE_PLAYLIST", "FAVOURITES"])
+    assert parser.completions(["SHOW_PLAYLIST"], "fav") == []
+
+
+def test_complete_command_lists_ids_titles_and_playlists():
+    sink = ListSink()
+    parser = CommandParser(VideoPlayer(output=sink))
+    parser.execute_command(["CREATE_PLAYLIST", "Fun_list"])
+    del sink.lines[:]
+    parser.execute_command(["COMPLETE", "fun"])
+    parser.execute_command(["COMPLETE", "life", "at"])
+    parser.execute_command(["COMPLETE", "xyz"])
+    assert sink.lines == [
+        "Completions for fun:",
+        "    Fun_list",
+        "    Funny Dogs",
+        "    funny_dogs_video_id",
+        "Completions for life at:",
+        "    Life at Google",
+        "No completions for xyz",
+    ]
+
+
+def test_bulk_commands_summarize_with_per_video_errors():
+    sink = ListSink()
+    parser = CommandParser(VideoPlayer(output=sink))
+    parser.execute_command(["CREATE_PLAYLIST", "my_playlist"])
+    parser.execute_command(["PLAY", "amazing_cats_video_id"])
+    del sink.lines[:]
+    parser.execute_command(["BULK_FLAG_VIDEO", "amazing_cats_video_id",
+                            "nothing_video_id", "nope", "reason=dont_like"])
+    parser.execute_command(["BULK_ADD_TO_PLAYLIST", "MY_PLAYLIST",
+                            "funny_dogs_video_id", "nothing_video_id",
+                            "funny_dogs_video_id"])
+    parser.execute_command(["BULK_ALLOW_VIDEO", "nothing_video_id",
+                            "funny_dogs_video_id"])
+    assert sink.lines == [
+        "Stopping video: Amazing Cats",
+        "Successfully flagged 2 videos (reason: dont_like)",
+        "    nope - Cannot flag video: Video does not exist",
+        "Added 1 video to MY_PLAYLIST",
+        "    nothing_video_id - Cannot add video to MY_PLAYLIST: Video is "
+        "currently flagged (reason: dont_like)",
+        "    funny_dogs_video_id - Cannot add video to MY_PLAYLIST: Video "
+        "already added",
+        "Successfully removed flag from 1 video",
+        "    funny_dogs_video_id - Cannot remove flag from video: Video is "
+        "not flagged",
+    ]
+    with pytest.raises(CommandException, match="BULK_FLAG_VIDEO command"):
+        parser.execute_command(["BULK_FLAG_VIDEO", "reason=spam"])
+    with pytest.raises(CommandException, match="BULK_ADD_TO_PLAYLIST command"):
+        parser.execute_command(["BULK_ADD_TO_PLAYLIST", "my_playlist"])
+
+
+def test_bulk_flag_only_stops_a_video_it_flagged():
+    library = VideoLibrary()
+    sink = ListSink()
+    parser = CommandParser(VideoPlayer(output=sink, library=library))
+    parser.execute_command(["PLAY", "amazing_cats_video_id"])
+    # Flagged elsewhere, as by another connection sharing the library.
+    library.flag_video("amazing_cats_video_id")
+    del sink.lines[:]
+    parser.execute_command(["BULK_FLAG_VIDEO", "nothing_video_id",
+                            "amazing_cats_video_id"])
+    assert sink.lines == [
+        "Successfully flagged 1 video (reason: Not supplied)",
+        "    amazing_cats_video_id - Cannot flag video: Video is already "
+        "flagged",
+    ]
+
+
+def test_bulk_command_arguments_complete_to_video_ids():
+    parser = CommandParser(VideoPlayer(output=ListSink()))
+    assert parser.completions(
+        ["BULK_FLAG_VIDEO", "amazing_cats_video_id"], "fun") == [
+        "funny_dogs_video_id"]
+    assert parser.completions(["FLAG_VIDEO", "funny_dogs_video_id"], "f") == []
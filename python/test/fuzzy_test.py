@@ -0,0 +1,43 @@
+import random
+
+from src.fuzzy import BKTree
+from src.fuzzy import edit_distance
+
+
+def test_edit_distance():
+    assert edit_distance("", "abc") == 3
+    assert edit_distance("kitten", "sitting") == 3
+    assert edit_distance("cat", "cat") == 0
+    assert edit_distance("cat", "cta") == 2
+    assert edit_distance("google", "gogle") == 1
+
+
+def test_bk_tree_matches_brute_force():
+    rng = random.Random(0)
+    words = {"".join(rng.choice("abcde") for _ in range(rng.randint(1, 7)))
+             for _ in range(500)}
+    tree = BKTree(words)
+    assert len(tree) == len(words)
+    for query in ("abc", "eeeee", "a", "badcab"):
+        for max_distance in (0, 1, 2):
+            assert tree.search(query, max_distance) == {
+                word: edit_distance(query, word) for word in words
+                if edit_distance(query, word) <= max_distance}
+
+
+def test_edit_distance_matches_dynamic_programming():
+    def table_distance(first, second):
+        previous = list(range(len(second) + 1))
+        for i, first_char in enumerate(first, 1):
+            current = [i]
+            for j, second_char in enumerate(second, 1):
+                current.append(min(previous[j] + 1, current[j - 1] + 1,
+                                   previous[j - 1] + (first_char != second_char)))
+            previous = current
+        return previous[-1]
+
+    rng = random.Random(1)
+    for _ in range(2000):
+        first = "".join(rng.choice("abc") for _ in range(rng.randint(0, 70)))
+        second = "".join(rng.choice("abc") for _ in range(rng.randint(0, 70)))
+        assert edit_distance(first, second) == table_distance(first, second)
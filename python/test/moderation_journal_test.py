@@ -0,0 +1,37 @@
+from src.moderation_journal import ModerationJournal
+from src.video_library import VideoLibrary
+
+
+def test_flags_are_restored_on_load(tmp_path):
+    path = tmp_path / "flags"
+    journal = ModerationJournal(path)
+    library = VideoLibrary(flag_journal=journal)
+    library.flag_video("amazing_cats_video_id", "dont_like_cats")
+    library.flag_video("funny_dogs_video_id")
+    library.allow_video("funny_dogs_video_id")
+    journal.close()
+
+    journal = ModerationJournal(path)
+    library = VideoLibrary(flag_journal=journal)
+    journal.close()
+    assert library.get_video("amazing_cats_video_id").flagged_reason == \
+        "dont_like_cats"
+    assert not library.get_video("funny_dogs_video_id").flag
+    assert all(video.video_id != "amazing_cats_video_id"
+               for video in (library.get_random_playable_video()
+                             for _ in range(20)))
+
+
+def test_journal_compacts_repeated_changes(tmp_path):
+    path = tmp_path / "flags"
+    journal = ModerationJournal(path, compact_min=10)
+    for _ in range(20):
+        journal.flagged("funny_dogs_video_id", "spam")
+        journal.allowed("funny_dogs_video_id")
+    journal.flagged("nothing_video_id", "empty")
+    journal.close()
+
+    assert len((tmp_path / "flags.log").read_text().splitlines()) < 10
+    journal = ModerationJournal(path)
+    journal.close()
+    assert journal.flags() == [("nothing_video_id", "empty")]
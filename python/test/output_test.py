@@ -0,0 +1,44 @@
+import io
+
+import pytest
+
+from src.output import BufferedSink
+from src.output import ListSink
+from src.output import NullSink
+from src.output import OutputSink
+from src.video_player import VideoPlayer
+
+
+def test_player_writes_to_injected_sink(capfd):
+    sink = ListSink()
+    player = VideoPlayer(output=sink)
+    player.show_all_videos()
+    out, err = capfd.readouterr()
+    assert out == ""
+    assert len(sink.lines) == 6
+    assert "Here's a list of all available videos:" in sink.lines[0]
+    assert "Amazing Cats (amazing_cats_video_id) [#cat #animal]" in sink.lines[1]
+
+
+def test_buffered_sink_writes_once_on_flush():
+    stream = io.StringIO()
+    sink = BufferedSink(stream)
+    sink.write("first")
+    sink.write_lines(["second", "third"])
+    assert stream.getvalue() == ""
+    sink.flush()
+    assert stream.getvalue() == "first\nsecond\nthird\n"
+
+
+def test_null_sink_still_produces_lines():
+    produced = []
+    NullSink().write_lines(produced.append(n) or n for n in range(3))
+    assert produced == [0, 1, 2]
+
+
+def test_output_sink_subclasses_must_implement_write():
+    class SilentSink(OutputSink):
+        pass
+
+    with pytest.raises(TypeError):
+        SilentSink()
@@ -0,0 +1,53 @@
+from src.output import ListSink
+from src.playlist_store import PlaylistStore
+from src.video_player import VideoPlayer
+
+
+def _player(store):
+    return VideoPlayer(output=ListSink(), playlist_store=store)
+
+
+def test_playlists_survive_reopening_the_store(tmp_path):
+    path = tmp_path / "playlists"
+    store = PlaylistStore(path)
+    player = _player(store)
+    player.create_playlist("my_PLAYlist")
+    player.add_to_playlist("my_playlist", "amazing_cats_video_id")
+    player.add_to_playlist("my_playlist", "funny_dogs_video_id")
+    player.add_to_playlist("my_playlist", "life_at_google_video_id")
+    player.remove_from_playlist("my_playlist", "funny_dogs_video_id")
+    player.create_playlist("to_delete")
+    player.delete_playlist("to_delete")
+    store.close()
+
+    sink = ListSink()
+    store = PlaylistStore(path)
+    player = VideoPlayer(output=sink, playlist_store=store)
+    player.show_all_playlists()
+    player.show_playlist("my_playlist")
+    store.close()
+    assert sink.lines == [
+        "Showing all playlists: ",
+        "    my_PLAYlist",
+        "Showing playlist: my_playlist",
+        "    Amazing Cats (amazing_cats_video_id) [#cat #animal]",
+        "    Life at Google (life_at_google_video_id) [#google #career]",
+    ]
+
+
+def test_compaction_keeps_only_live_state(tmp_path):
+    path = tmp_path / "playlists"
+    store = PlaylistStore(path, compact_min=10)
+    player = _player(store)
+    player.create_playlist("my_playlist")
+    for _ in range(10):
+        player.add_to_playlist("my_playlist", "amazing_cats_video_id")
+        player.clear_playlist("my_playlist")
+    player.add_to_playlist("my_playlist", "funny_dogs_video_id")
+    store.close()
+
+    log_lines = (tmp_path / "playlists.log").read_text().splitlines()
+    assert len(log_lines) < 10
+    store = PlaylistStore(path)
+    assert list(store.playlists()) == [("my_playlist", ["funny_dogs_video_id"])]
+    store.close()
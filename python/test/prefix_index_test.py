@@ -0,0 +1,23 @@
+from src.prefix_index import PrefixIndex
+
+
+def test_complete_ignores_case_and_keeps_order():
+    index = PrefixIndex(["beta", "Alpha", "alpha", "alphabet", "gamma"])
+    assert index.complete("AL") == ["Alpha", "alpha", "alphabet"]
+    assert index.complete("al", limit=2) == ["Alpha", "alpha"]
+    assert index.complete("") == ["Alpha", "alpha", "alphabet", "beta",
+                                  "gamma"]
+    assert index.complete("delta") == []
+
+
+def test_names_are_counted():
+    index = PrefixIndex(["Cats", "Cats"])
+    assert index.complete("c") == ["Cats"]
+    index.remove("Cats")
+    assert index.complete("c") == ["Cats"]
+    index.remove("Cats")
+    index.remove("Cats")
+    assert index.complete("c") == []
+    index.add("Cats")
+    index.add("cats")
+    assert len(index) == 2
@@ -0,0 +1,53 @@
+import io
+
+from src.run import main
+from src.run import run_batch
+
+
+def test_run_batch_plays_the_search_answer_given(capfd):
+    script = io.StringIO(
+        "SEARCH_VIDEOS cat\n"
+        "\n"
+        "SHOW_PLAYING\n"
+        "EXIT\n"
+        "STOP\n")
+    run_batch(script, buffer_output=True, search_answer=1)
+    out, err = capfd.readouterr()
+    lines = out.splitlines()
+    assert len(lines) == 7
+    assert "Playing video: Amazing Cats" in lines[5]
+    assert "Currently playing: Amazing Cats (amazing_cats_video_id) " \
+           "[#cat #animal]" in lines[6]
+
+
+def test_run_batch_runs_the_line_after_a_search_as_a_command(capfd):
+    script = io.StringIO(
+        "SEARCH_VIDEOS cat\n"
+        "SHOW_PLAYING\n"
+        "SEARCH_VIDEOS blah\n"
+        "SHOW_PLAYING\n")
+    run_batch(script)
+    lines = capfd.readouterr()[0].splitlines()
+    assert lines[5:] == [
+        "No video is currently playing",
+        "No search results for blah",
+        "No video is currently playing",
+    ]
+
+
+def test_main_keeps_a_catalog_snapshot_in_the_state_dir(tmp_path, capfd):
+    script = tmp_path / "commands.txt"
+    script.write_text("FLAG_VIDEO funny_dogs_video_id\nNUMBER_OF_VIDEOS\n")
+    state_dir = tmp_path / "state"
+
+    main(["--batch", str(script), "--state-dir", str(state_dir)])
+    main(["--batch", str(script), "--state-dir", str(state_dir)])
+
+    assert (state_dir / "catalog.snapshot").exists()
+    lines = capfd.readouterr()[0].splitlines()
+    assert lines == [
+        "Successfully flagged video: Funny Dogs (reason: Not supplied)",
+        "5 videos in the library",
+        "Cannot flag video: Video is already flagged",
+        "5 videos in the library",
+    ]
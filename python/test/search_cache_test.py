@@ -0,0 +1,92 @@
+from src.output import ListSink
+from src.search_cache import SearchCache
+from src.video import Video
+from src.video_library import VideoLibrary
+from src.video_player import VideoPlayer
+
+
+def test_cache_drops_least_recently_used():
+    cache = SearchCache(max_entries=2)
+    cache.put("a", 0, "A")
+    cache.put("b", 0, "B")
+    assert cache.get("a", 0) == "A"
+    cache.put("c", 0, "C")
+    assert cache.get("b", 0) is None
+    assert cache.get("a", 0) == "A"
+    assert cache.get("c", 0) == "C"
+    assert (cache.hits, cache.misses) == (3, 1)
+    assert len(cache) == 2
+
+
+def test_cache_ignores_older_generations():
+    cache = SearchCache()
+    cache.put("a", 1, "A")
+    assert cache.get("a", 2) is None
+    assert cache.misses == 1
+
+
+def test_repeated_searches_are_served_from_cache():
+    library = VideoLibrary()
+    player = VideoPlayer(input_reader=lambda: "no", output=ListSink(),
+                         library=library)
+    player.search_videos("cat")
+    player.search_videos("CAT")
+    player.search_videos_tag("#animal")
+    player.search_videos_tag("#ANIMAL")
+    assert (library.search_cache.hits, library.search_cache.misses) == (2, 2)
+
+
+def test_library_changes_invalidate_cached_results():
+    library = VideoLibrary()
+
+    def titles(search):
+        return [video.title for video in search.iter_from()]
+
+    assert titles(library.search_playable_titles("cat")) == [
+        "Amazing Cats", "Another Cat Video"]
+    library.flag_video("amazing_cats_video_id")
+    assert titles(library.search_playable_titles("cat")) == [
+        "Another Cat Video"]
+    library.allow_video("amazing_cats_video_id")
+    library.add_video(Video("Cat Facts", "cat_facts_id", ["#cat"]))
+    assert titles(library.playable_videos_with_tag("#cat")) == [
+        "Amazing Cats", "Another Cat Video", "Cat Facts"]
+    library.remove_video("another_cat_video_id")
+    assert titles(library.playable_videos_with_tag("#cat")) == [
+        "Amazing Cats", "Cat Facts"]
+    assert library.search_cache.hits == 0
+
+
+def test_cache_bounds_the_total_length_of_results():
+    cache = SearchCache(max_total_length=5)
+    cache.put("a", 0, "AA")
+    cache.put("b", 0, "BBB")
+    cache.put("a", 0, "AA")
+    cache.put("c", 0, "C")
+    assert cache.get("b", 0) is None
+    assert cache.get("a", 0) == "AA"
+    cache.put("d", 0, "DDDDDD")
+    assert cache.get("d", 0) is None
+    assert len(cache) == 2
+
+
+def test_tags_longer_than_the_cache_are_paged_from_the_tag_index():
+    library = VideoLibrary(search_cache_length=2)
+    library.flag_video("another_cat_video_id")
+    sink = ListSink()
+    player = VideoPlayer(input_reader=lambda: "no", output=sink,
+                         library=library)
+    player.search_videos_tag("#animal", limit=1)
+    cursor = sink.lines[2].split(": ")[1]
+    player.search_videos_tag("#animal", limit=1, cursor=cursor)
+    player.search_videos_tag("#animal", limit=1, page=2)
+    player.search_videos_tag("#animal", limit=1, page=3)
+    assert [line for line in sink.lines if line.startswith("  ")] == [
+        "  1) Amazing Cats (amazing_cats_video_id) [#cat #animal]",
+        "  1) Funny Dogs (funny_dogs_video_id) [#dog #animal]",
+        "  1) Funny Dogs (funny_dogs_video_id) [#dog #animal]",
+        "    No more results",
+    ]
+    assert (library.search_cache.hits, library.search_cache.misses) == (0, 0)
+    player.search_videos_tag("#cat")
+    assert library.search_cache.misses == 1
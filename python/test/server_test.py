@@ -0,0 +1,73 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+from src.server import VideoServer
+
+
+async def _send(port, commands):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write("".join(f"{command}\n" for command in commands).encode())
+    await writer.drain()
+    output = await reader.read()
+    writer.close()
+    return output.decode().splitlines()
+
+
+async def _run_sessions():
+    video_server = VideoServer()
+    server = await video_server.start("127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    async with server:
+        first = await _send(port, [
+            "CREATE_PLAYLIST my_playlist",
+            "FLAG_VIDEO funny_dogs_video_id",
+            "SEARCH_VIDEOS cat",
+            "2",
+            "EXIT",
+        ])
+        second = await _send(port, [
+            "SHOW_ALL_PLAYLISTS",
+            "PLAY funny_dogs_video_id",
+            "EXIT",
+        ])
+    return first, second
+
+
+def test_sessions_share_library_but_not_playlists():
+    first, second = asyncio.run(_run_sessions())
+    assert "Successfully created new playlist: my_playlist" in first[2]
+    assert "Successfully flagged video: Funny Dogs (reason: Not supplied)" \
+           in first[3]
+    assert "Playing video: Another Cat Video" in first[9]
+    assert "YouTube has now terminated its execution." in first[10]
+    assert "No playlists exist yet" in second[2]
+    assert "Cannot play video: Video is currently flagged " \
+           "(reason: Not supplied)" in second[3]
+
+
+async def _run_waiting_sessions():
+    # Searches waiting for their answers must hold no thread, or this
+    # single thread pool would leave none for the other connections.
+    asyncio.get_running_loop().set_default_executor(ThreadPoolExecutor(1))
+    server = await VideoServer().start("127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    async with server:
+        waiting = []
+        for _ in range(5):
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.write(b"SEARCH_VIDEOS cat\n")
+            await writer.drain()
+            # The question asked after the results shows the search waits.
+            await asyncio.wait_for(
+                reader.readuntil(b"number of the video."), timeout=5)
+            waiting.append(writer)
+        output = await asyncio.wait_for(
+            _send(port, ["NUMBER_OF_VIDEOS", "EXIT"]), timeout=5)
+        for writer in waiting:
+            writer.close()
+    return output
+
+
+def test_sessions_waiting_for_an_answer_do_not_block_others():
+    output = asyncio.run(_run_waiting_sessions())
+    assert "5 videos in the library" in output[2]
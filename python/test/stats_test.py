@@ -0,0 +1,63 @@
+import json
+
+from src.command_parser import CommandParser
+from src.output import ListSink
+from src.stats import CommandStats
+from src.stats import LatencyHistogram
+from src.video_library import VideoLibrary
+from src.video_player import VideoPlayer
+
+
+def test_histogram_buckets_by_power_of_two():
+    histogram = LatencyHistogram()
+    for ns in (3, 100, 120, 1000):
+        histogram.record(ns)
+    assert histogram.count == 4
+    assert histogram.max_ns == 1000
+    assert histogram.buckets() == {4: 1, 128: 2, 1024: 1}
+    assert histogram.percentile(0.5) == 128
+    assert histogram.percentile(1) == 1000
+
+
+def test_stats_record_commands_and_hit_rates():
+    stats = CommandStats()
+    stats.record("PLAY", 2000)
+    stats.record("PLAY", 4000)
+    stats.hit("title_index")
+    stats.miss("title_index")
+    stats.hit("title_index")
+    data = json.loads(stats.to_json())
+    assert data["commands"]["PLAY"]["count"] == 2
+    assert data["commands"]["PLAY"]["mean_ns"] == 3000
+    assert data["hit_rates"]["title_index"] == {
+        "hits": 2, "misses": 1, "rate": 2 / 3}
+    stats.reset()
+    assert stats.format_lines() == ["No statistics have been recorded yet."]
+
+
+def test_stats_command_shows_parser_timings():
+    stats = CommandStats()
+    sink = ListSink()
+    player = VideoPlayer(input_reader=lambda: "no", output=sink,
+                         library=VideoLibrary(stats=stats))
+    parser = CommandParser(player, stats=stats)
+    parser.execute_command(["play", "amazing_cats_video_id"])
+    parser.execute_command(["SEARCH_VIDEOS", "cat"])
+    parser.execute_command(["NOT_A_COMMAND"])
+    del sink.lines[:]
+    parser.execute_command(["STATS"])
+    assert sink.lines[0] == "Command latencies:"
+    assert sink.lines[1].startswith("    PLAY: 1 calls, mean ")
+    assert sink.lines[2].startswith("    SEARCH_VIDEOS: 1 calls, mean ")
+    assert sink.lines[3:] == [
+        "Hit rates:", "    search_cache: 0 hits, 1 misses (0.0%)",
+        "    title_index: 1 hits, 0 misses (100.0%)"]
+    parser.execute_command(["STATS", "json"])
+    assert set(json.loads(sink.lines[-1])["commands"]) == {
+        "PLAY", "SEARCH_VIDEOS", "STATS"}
+
+
+def test_stats_command_without_stats():
+    sink = ListSink()
+    CommandParser(VideoPlayer(output=sink)).execute_command(["STATS"])
+    assert sink.lines == ["Statistics are not being collected."]
@@ -0,0 +1,33 @@
+from src.video import Video
+
+
+def test_row_is_reused_until_flag_changes():
+    video = Video("Funny Dogs", "funny_dogs_video_id", ["#dog", "#animal"])
+    row = video.format_row()
+    assert row == "    Funny Dogs (funny_dogs_video_id) [#dog #animal]"
+    assert video.format_row() is row
+    assert video.format_tags() is video.format_tags()
+
+    video.set_flag("dont_like_dogs")
+    assert video.format_row() == (
+        "    Funny Dogs (funny_dogs_video_id) [#dog #animal] - FLAGGED "
+        "(reason: dont_like_dogs)")
+    video.allow()
+    assert video.format_row() == row
+
+
+def test_stale_row_is_rebuilt():
+    video = Video("Video about nothing", "nothing_video_id", [])
+    video.format_row()
+    # A row cached for an older flag state, as another thread could leave.
+    video._flag_reason = "Not supplied"
+    assert video.format_row().endswith(" - FLAGGED (reason: Not supplied)")
+
+
+def test_videos_have_no_instance_dict_and_share_tags():
+    # Built at run time, so the two tag strings start out as different
+    # objects rather than one shared constant.
+    first = Video("Funny Dogs", "funny_dogs_video_id", ["".join(["#", "dog"])])
+    second = Video("Sad Dogs", "sad_dogs_video_id", ["".join(["#d", "og"])])
+    assert not hasattr(first, "__dict__")
+    assert first.tags[0] is second.tags[0]
@@ -1,3 +1,6 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from src.video import Video
 from src.video_library import VideoLibrary
 
 
@@ -24,3 +27,177 @@ def test_parses_video_correctly_without_tags():
     assert video.title == "Video about nothing"
     assert video.video_id == "nothing_video_id"
     assert video.tags == ()
+
+
+def test_videos_with_tag_are_sorted_by_title():
+    library = VideoLibrary()
+    videos = list(library.get_videos_with_tag("#CAT"))
+
+    assert [video.video_id for video in videos] == [
+        "amazing_cats_video_id", "another_cat_video_id"]
+    assert list(library.get_videos_with_tag("#unknown")) == []
+
+
+def test_search_titles_uses_substring_match():
+    library = VideoLibrary()
+
+    assert [video.video_id for video in library.search_titles("CAT")] == [
+        "amazing_cats_video_id", "another_cat_video_id"]
+    # Case-insensitive, and only whole-term matches are returned.
+    assert [video.title for video in library.search_titles("cats")] == [
+        "Amazing Cats"]
+    # Terms shorter than a trigram fall back to scanning.
+    assert [video.title for video in library.search_titles("go")] == [
+        "Life at Google"]
+    assert library.search_titles("blah") == []
+
+
+def test_title_order_is_maintained_on_add_and_remove():
+    library = VideoLibrary()
+    library.add_video(Video("Best Of Cats", "best_cats_video_id", ["#cat"]))
+    library.remove_video("amazing_cats_video_id")
+
+    assert len(library) == 5
+    assert [video.title for video in library.iter_videos()] == [
+        "Another Cat Video", "Best Of Cats", "Funny Dogs", "Life at Google",
+        "Video about nothing"]
+    assert [video.video_id for video in library.get_videos_with_tag("#cat")] == [
+        "another_cat_video_id", "best_cats_video_id"]
+    assert [video.title for video in library.search_titles("cats")] == [
+        "Best Of Cats"]
+
+
+def test_search_titles_follows_added_and_removed_videos():
+    library = VideoLibrary()
+    library.search_titles("cats")
+    library.add_video(Video("Best Of Cats", "best_cats_video_id", ["#cat"]))
+    library.remove_video("amazing_cats_video_id")
+
+    assert [video.title for video in library.search_titles("cats")] == [
+        "Best Of Cats"]
+    assert [video.title for video in library.search_titles("at")] == [
+        "Another Cat Video", "Best Of Cats", "Life at Google"]
+
+
+def test_random_playable_video_skips_flagged_videos():
+    library = VideoLibrary()
+    for video in library.get_all_videos():
+        if video.video_id != "funny_dogs_video_id":
+            library.flag_video(video.video_id)
+
+    assert library.get_random_playable_video().video_id == "funny_dogs_video_id"
+
+    library.flag_video("funny_dogs_video_id")
+    assert library.get_random_playable_video() is None
+
+    library.allow_video("nothing_video_id")
+    assert library.get_random_playable_video().video_id == "nothing_video_id"
+
+
+def test_lazy_library_materializes_videos_on_demand():
+    library = VideoLibrary(lazy=True)
+
+    assert len(library) == 5
+    assert library._videos == {}
+    video = library.get_video("amazing_cats_video_id")
+    assert video.title == "Amazing Cats"
+    assert set(video.tags) == {"#cat", "#animal"}
+    assert list(library._videos) == ["amazing_cats_video_id"]
+    assert library.get_video("does_not_exist") is None
+
+    library.flag_video("amazing_cats_video_id")
+    # Listing loads the rest of the catalog, keeping the flagged video.
+    assert [video.video_id for video in library.iter_videos()][:2] == [
+        "amazing_cats_video_id", "another_cat_video_id"]
+    assert library.get_video("amazing_cats_video_id") is video
+    assert video.flag
+    assert len(library) == 5
+
+
+def test_concurrent_flagging_succeeds_once():
+    library = VideoLibrary()
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(
+            lambda i: library.flag_video("funny_dogs_video_id", f"reason_{i}"),
+            range(100)))
+
+    assert results.count(True) == 1
+    video = library.get_video("funny_dogs_video_id")
+    assert video.flagged_reason == f"reason_{results.index(True)}"
+    assert library.allow_video("funny_dogs_video_id")
+    assert video.flagged_reason is None
+
+
+def test_search_ranked_orders_by_relevance():
+    library = VideoLibrary()
+    library.add_video(Video("Cat Cat Cat", "cat_cat_video_id", ["#cat"]))
+
+    results = library.search_ranked("cat animal", k=3)
+    assert [video.video_id for video in results] == [
+        "another_cat_video_id", "amazing_cats_video_id", "cat_cat_video_id"]
+    assert [video.video_id for video in library.search_ranked("CAT", k=1)] == [
+        "cat_cat_video_id"]
+
+    library.flag_video("cat_cat_video_id")
+    assert "cat_cat_video_id" not in [
+        video.video_id for video in library.search_ranked("cat")]
+    assert library.search_ranked("unknown") == []
+
+    library.remove_video("cat_cat_video_id")
+    assert [video.video_id for video in library.search_ranked("CAT", k=1)] == [
+        "another_cat_video_id"]
+
+
+def test_search_fuzzy_tolerates_typos():
+    library = VideoLibrary()
+    assert [video.video_id for video in library.search_fuzzy("amzing")] == [
+        "amazing_cats_video_id"]
+    # Exact matches rank before ones needing edits.
+    assert [video.video_id for video in library.search_fuzzy("cats")] == [
+        "amazing_cats_video_id", "another_cat_video_id"]
+    assert [video.video_id
+            for video in library.search_fuzzy("gogle lfe")] == [
+        "life_at_google_video_id"]
+    assert library.search_fuzzy("xyzzy") == []
+    assert library.search_fuzzy("gogle", max_distance=0) == []
+
+
+def test_search_fuzzy_follows_added_and_removed_videos():
+    library = VideoLibrary()
+    library.search_fuzzy("dogs")
+    library.add_video(Video("Sleepy Puppies", "puppies_video_id", ["#dog"]))
+    assert [video.video_id for video in library.search_fuzzy("puppys")] == [
+        "puppies_video_id"]
+    library.remove_video("puppies_video_id")
+    assert library.search_fuzzy("puppys") == []
+
+
+def test_completions_follow_added_and_removed_videos():
+    library = VideoLibrary()
+    assert library.complete_video_ids("fun") == ["funny_dogs_video_id"]
+    library.add_video(Video("Funny Cats", "funny_cats_video_id", []))
+    assert library.complete_video_ids("FUNNY") == [
+        "funny_cats_video_id", "funny_dogs_video_id"]
+    assert library.complete_titles("funny", limit=1) == ["Funny Cats"]
+    library.remove_video("funny_dogs_video_id")
+    assert library.complete_titles("funny") == ["Funny Cats"]
+
+
+def test_flag_and_allow_videos_in_bulk():
+    library = VideoLibrary()
+    generation = library.generation
+    assert library.flag_videos(
+        ["funny_dogs_video_id", "nope", "funny_dogs_video_id",
+         "life_at_google_video_id"], "spam") == [True, False, False, True]
+    assert library.generation == generation + 1
+    assert library.get_video("funny_dogs_video_id").flagged_reason == "spam"
+    playable = {library.get_random_playable_video().video_id
+                for _ in range(200)}
+    assert playable == {"amazing_cats_video_id", "another_cat_video_id",
+                        "nothing_video_id"}
+
+    assert library.allow_videos(
+        ["funny_dogs_video_id", "nothing_video_id"]) == [True, False]
+    assert not library.get_video("funny_dogs_video_id").flag
+    assert library.flag_videos(["nope"]) == [False]
+    assert library.generation == generation + 2